@@ -270,18 +270,12 @@ class HEO_Node(Node):
                 print(f"[HEO] Block {block['block_hash'][:10]} contains double spends. Skipping...")
             else:
                 super().process_received_data(data)
+                # Mark transactions as seen only once the block is accepted
+                self.seen_tx_hashes.update(tx['hash'] for tx in block['transactions'])
 
     def contains_double_spends(self, block):
-        tx_hashes = set()
-        for tx in block['transactions']:
-            tx_hash = tx['hash']
-            if tx_hash in tx_hashes or tx_hash in self.seen_tx_hashes:
-                return True  # Found a double spend
-            tx_hashes.add(tx_hash)
-
-        # Mark transactions in this block as seen
-        self.seen_tx_hashes.update(tx_hashes)
-        return False
+        tx_hashes = [tx['hash'] for tx in block['transactions']]
+        return len(set(tx_hashes)) != len(tx_hashes) or any(h in self.seen_tx_hashes for h in tx_hashes)
 
     def is_block_finalized(self, block_hash):
         return block_hash in self.confirmed_blocks
@@ -0,0 +1,171 @@
+import math
+import time
+from aiohttp import web
+
+# Write requests served at once; past this a request is turned away with 503.
+MAX_INFLIGHT_WRITES = 256
+
+# Retry-After, in seconds, sent with a 503 for too many requests in flight.
+BUSY_RETRY_AFTER = 1
+
+# Token bucket per client address: sustained writes per second, and burst.
+CLIENT_WRITE_RATE = 1000.0
+CLIENT_WRITE_BURST = 2000
+
+# Token bucket shared by all clients.
+GLOBAL_WRITE_RATE = 5000.0
+GLOBAL_WRITE_BURST = 10_000
+
+# Client buckets kept at most; idle ones are dropped first.
+CLIENT_BUCKET_LIMIT = 10_000
+
+# Token buckets for /heartbeat, which any address may call to announce a node.
+HEARTBEAT_CLIENT_RATE = 5.0
+HEARTBEAT_CLIENT_BURST = 20
+HEARTBEAT_GLOBAL_RATE = 200.0
+HEARTBEAT_GLOBAL_BURST = 400
+
+# Write requests from other nodes served at once, and their token buckets.
+# They are kept apart from client writes so a client flood cannot refuse
+# the votes, blocks and relayed transactions that consensus depends on.
+MAX_INFLIGHT_PEER_WRITES = 256
+PEER_WRITE_RATE = 2000.0
+PEER_WRITE_BURST = 4000
+PEER_GLOBAL_WRITE_RATE = 10_000.0
+PEER_GLOBAL_WRITE_BURST = 20_000
+
+# Endpoints that change state and are admitted through the client limits.
+WRITE_PATHS = frozenset({
+    "/propose_block", "/submit_transaction", "/submit_transactions", "/broadcast_block", "/sync",
+})
+
+# Node-to-node endpoints, admitted through the peer limits.
+PEER_PATHS = frozenset({"/vote", "/receive_block", "/relay_transactions"})
+
+
+class TokenBucket:
+    """`rate` tokens per second, up to `capacity`."""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate, capacity, now):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait(self, cost):
+        """Seconds until `cost` tokens are available; a cost over capacity waits for a full bucket."""
+        return max(0.0, min(cost, self.capacity) - self.tokens) / self.rate
+
+    def take(self, cost):
+        self.tokens -= min(cost, self.capacity)
+
+
+class Admission:
+    """In-flight limit and per-client plus global token buckets for write endpoints.
+
+    A request past the in-flight limit, or one the global bucket cannot
+    cover, gets 503: the node as a whole is saturated. A client over its
+    own bucket gets 429. Both carry a Retry-After. Tokens are only taken
+    when both buckets can cover the cost, so a refused request costs
+    nothing.
+    """
+
+    def __init__(self, max_inflight=MAX_INFLIGHT_WRITES, client_rate=CLIENT_WRITE_RATE,
+                 client_burst=CLIENT_WRITE_BURST, global_rate=GLOBAL_WRITE_RATE, global_burst=GLOBAL_WRITE_BURST,
+                 client_limit=CLIENT_BUCKET_LIMIT):
+        self.max_inflight = max_inflight
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.client_limit = client_limit
+        self.global_bucket = TokenBucket(global_rate, global_burst, time.monotonic())
+        self.clients = {}  # address -> TokenBucket, least recently used first
+        self.inflight = 0
+        self.admitted = 0
+        self.throttled = 0  # 429s
+        self.shed = 0  # 503s
+
+    def _client_bucket(self, client, now):
+        bucket = self.clients.pop(client, None)
+        if bucket is None:
+            if len(self.clients) >= self.client_limit:
+                del self.clients[next(iter(self.clients))]
+            bucket = TokenBucket(self.client_rate, self.client_burst, now)
+        self.clients[client] = bucket
+        return bucket
+
+    def take(self, client, cost=1):
+        """Spend `cost` tokens for `client`; returns None, or (status, retry_after) if refused."""
+        now = time.monotonic()
+        bucket = self._client_bucket(client, now)
+        bucket.refill(now)
+        self.global_bucket.refill(now)
+        if bucket.wait(cost) > 0:
+            self.throttled += 1
+            return 429, bucket.wait(cost)
+        if self.global_bucket.wait(cost) > 0:
+            self.shed += 1
+            return 503, self.global_bucket.wait(cost)
+        bucket.take(cost)
+        self.global_bucket.take(cost)
+        return None
+
+    def stats(self):
+        return {
+            "inflight": self.inflight,
+            "max_inflight": self.max_inflight,
+            "admitted": self.admitted,
+            "throttled": self.throttled,
+            "shed": self.shed,
+            "clients": len(self.clients),
+            "global_tokens": round(self.global_bucket.tokens, 1),
+        }
+
+
+def refusal(status, retry_after):
+    """The 429 or 503 response for a refused write."""
+    message = "Too many requests from this client" if status == 429 else "Node is overloaded"
+    return web.json_response({"error": message, "retry_after": round(retry_after, 3)}, status=status,
+                             headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+
+
+admission = Admission()
+peer_admission = Admission(max_inflight=MAX_INFLIGHT_PEER_WRITES, client_rate=PEER_WRITE_RATE,
+                           client_burst=PEER_WRITE_BURST, global_rate=PEER_GLOBAL_WRITE_RATE,
+                           global_burst=PEER_GLOBAL_WRITE_BURST)
+heartbeat_admission = Admission(client_rate=HEARTBEAT_CLIENT_RATE, client_burst=HEARTBEAT_CLIENT_BURST,
+                                global_rate=HEARTBEAT_GLOBAL_RATE, global_burst=HEARTBEAT_GLOBAL_BURST)
+
+
+@web.middleware
+async def admit_writes(request, handler):
+    """Run write requests through their in-flight limit and token buckets; reads pass straight through.
+
+    Client writes and node-to-node writes are admitted separately, by
+    `admission` and `peer_admission`.
+    """
+    if request.method != "POST":
+        return await handler(request)
+    if request.path in PEER_PATHS:
+        limits = peer_admission
+    elif request.path in WRITE_PATHS:
+        limits = admission
+    else:
+        return await handler(request)
+    if limits.inflight >= limits.max_inflight:
+        limits.shed += 1
+        return refusal(503, BUSY_RETRY_AFTER)
+    refused = limits.take(request.remote)
+    if refused:
+        return refusal(*refused)
+    limits.admitted += 1
+    limits.inflight += 1
+    try:
+        return await handler(request)
+    finally:
+        limits.inflight -= 1
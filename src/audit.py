@@ -0,0 +1,149 @@
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import libsql_client
+import database
+from consensus import POA_WINDOW, poa_from_hashes
+
+# Blocks checked per worker task.
+AUDIT_RANGE_SIZE = 10_000
+
+
+def audit_range(db_path, first, last):
+    """Check blocks first..last of a chain database and summarize the range.
+
+    Index order, previous_hash linkage and PoA are checked inside the range;
+    the preceding POA_WINDOW blocks are read so the first blocks' PoA can be
+    checked too. Blocks stored in the binary encoding carry their hash, which
+    is compared against the hash recomputed from their contents. Rows written
+    before that encoding have no stored hash: theirs is recomputed, so for
+    them only the linkage to the next block is checked.
+
+    Duplicate tx ids are found without collecting them: tx_id is the key of
+    the transactions table, so every transaction must have its row pointing
+    back at its own block and position. The boundary hashes are returned so
+    ranges can be stitched together.
+    """
+    client = libsql_client.create_client_sync(f"file:{db_path}")
+    errors = []
+    history = []
+    previous = None
+    summary = {"first": first, "last": last, "blocks": 0, "first_index": None,
+               "last_index": None, "first_previous_hash": None, "last_hash": None}
+    try:
+        after = first - POA_WINDOW - 1
+        while True:
+            rows = client.execute(
+                "SELECT * FROM blockchain WHERE block_index > ? AND block_index <= ? ORDER BY block_index ASC LIMIT ?",
+                (after, last, database.BLOCK_PAGE_SIZE)
+            ).rows
+            recorded = recorded_positions(client, rows[0][0], rows[-1][0]) if rows else {}
+            for row in rows:
+                block = database.row_to_block(row)
+                if block.block_index >= first:
+                    check_block(block, previous, history, errors)
+                    if isinstance(row[3], bytes) and block.hash != block.calculate_hash():
+                        errors.append(f"Block {block.block_index}: stored hash does not match its contents")
+                    check_transactions(client, block, recorded, errors)
+                    if summary["first_index"] is None:
+                        summary["first_index"] = block.block_index
+                        summary["first_previous_hash"] = block.previous_hash
+                    summary["blocks"] += 1
+                    summary["last_index"] = block.block_index
+                    summary["last_hash"] = block.hash
+                    previous = block
+                history = (history + [block.hash])[-POA_WINDOW:]
+            if len(rows) < database.BLOCK_PAGE_SIZE:
+                break
+            after = rows[-1][0]
+    finally:
+        client.close()
+    summary["errors"] = errors
+    return summary
+
+
+def recorded_positions(client, first, last):
+    """{(block_index, position): tx_id} of the transactions rows filed under blocks first..last."""
+    rows = client.execute(
+        "SELECT block_index, position, tx_id FROM transactions WHERE block_index BETWEEN ? AND ?",
+        (first, last)
+    ).rows
+    return {(block_index, position): tx_id for block_index, position, tx_id in rows}
+
+
+def check_transactions(client, block, recorded, errors):
+    """Append an error for each transaction of `block` whose row is filed elsewhere."""
+    for position, tx in enumerate(block.data):
+        if not isinstance(tx, dict) or "tx_id" not in tx:
+            continue
+        if recorded.get((block.block_index, position)) == tx["tx_id"]:
+            continue
+        row = client.execute(
+            "SELECT block_index, position FROM transactions WHERE tx_id = ?", (tx["tx_id"],)
+        ).rows
+        if row:
+            errors.append(f"Duplicate transaction id: {tx['tx_id']} in block {block.block_index}, "
+                          f"first recorded in block {row[0][0]} at position {row[0][1]}")
+        else:
+            errors.append(f"Block {block.block_index}: transaction {tx['tx_id']} is missing from the transactions table")
+
+
+def check_block(block, previous, history, errors):
+    """Append an error for each way `block` breaks the chain rules."""
+    if previous is not None:
+        if block.block_index != previous.block_index + 1:
+            errors.append(f"Block {block.block_index}: follows block {previous.block_index}")
+        if block.previous_hash != previous.hash:
+            errors.append(f"Block {block.block_index}: previous_hash does not match block {previous.block_index}")
+    if history and block.proof_of_accuracy != poa_from_hashes(history):
+        errors.append(f"Block {block.block_index}: invalid Proof of Accuracy")
+
+
+def audit_chain(db_path=database.DB_PATH, workers=None, range_size=AUDIT_RANGE_SIZE):
+    """Audit a whole chain database in parallel ranges and return a report."""
+    client = libsql_client.create_client_sync(f"file:{db_path}")
+    try:
+        low, high = client.execute("SELECT MIN(block_index), MAX(block_index) FROM blockchain").rows[0]
+    finally:
+        client.close()
+    if low is None:
+        return {"blocks": 0, "errors": [], "seconds": 0.0, "blocks_per_second": 0.0}
+
+    start = time.perf_counter()
+    bounds = [(first, min(first + range_size - 1, high)) for first in range(low, high + 1, range_size)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(audit_range, [db_path] * len(bounds), *zip(*bounds)))
+
+    errors = []
+    previous = None
+    for result in results:
+        errors.extend(result["errors"])
+        if result["blocks"] == 0:
+            continue
+        # Stitch this range to the last non-empty one before it
+        if previous is not None:
+            if result["first_index"] != previous["last_index"] + 1:
+                errors.append(f"Block {result['first_index']}: follows block {previous['last_index']}")
+            if result["first_previous_hash"] != previous["last_hash"]:
+                errors.append(f"Block {result['first_index']}: previous_hash does not match block {previous['last_index']}")
+        previous = result
+
+    seconds = time.perf_counter() - start
+    blocks = sum(result["blocks"] for result in results)
+    return {
+        "blocks": blocks,
+        "errors": errors,
+        "seconds": seconds,
+        "blocks_per_second": blocks / seconds if seconds else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else database.DB_PATH
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    report = audit_chain(db_path, workers)
+    for error in report["errors"]:
+        print(f"[ERROR] {error}")
+    print(f"[INFO] Audited {report['blocks']} blocks in {report['seconds']:.2f}s "
+          f"({report['blocks_per_second']:.0f} blocks/s), {len(report['errors'])} problems found.")
+    sys.exit(1 if report["errors"] else 0)
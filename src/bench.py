@@ -0,0 +1,224 @@
+"""Microbenchmarks for the node's storage paths and HTTP API.
+
+Usage: python bench.py encoding|compression|block [--blocks N] [--txs N]
+       python bench.py api --key OPERATOR_KEY [--url URL] [--requests N] [--concurrency N]
+
+To compare two revisions of the node, start each one from its own checkout
+with an empty directory (no blockchain.db, a fresh operator.key) and run the
+same `bench.py api` against it with its operator.key.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import string
+import time
+import aiohttp
+from nacl.signing import SigningKey
+from block import Block, decode_block, encode_block
+from consensus import POA_WINDOW, poa_from_hashes
+from transaction import address_of, load_signing_key, sign_transaction
+
+
+def sample_blocks(count, txs):
+    """Blocks shaped like the ones propose_block commits."""
+    def address():
+        return "".join(random.choices(string.ascii_letters + string.digits, k=16))
+    blocks = []
+    for index in range(1, count + 1):
+        data = [{"tx_id": f"TX{index}-{i}", "sender": address(), "receiver": address(),
+                 "amount": round(random.uniform(1, 100), 2), "fee": round(random.uniform(0.01, 1), 2),
+                 "nonce": i} for i in range(txs)]
+        blocks.append(Block(index, "%064x" % random.getrandbits(256), time.time(), data, address(), "GENESIS_PoA"))
+    return blocks
+
+
+def timed(fn, items):
+    """Seconds per item for fn over items."""
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - start) / len(items)
+
+
+def bench_encoding(args):
+    """Compare the binary block encoding against the JSON data column."""
+    blocks = sample_blocks(args.blocks, args.txs)
+    as_json = [json.dumps(block.data) for block in blocks]
+    as_binary = [encode_block(block) for block in blocks]
+    json_rows = [(b.block_index, b.previous_hash, b.timestamp, text, b.proposer, b.proof_of_accuracy)
+                 for b, text in zip(blocks, as_json)]
+
+    def json_decode(row):
+        return Block(row[0], row[1], row[2], json.loads(row[3]), row[4], row[5])
+
+    results = {
+        "json decode": timed(json_decode, json_rows),
+        "binary header only": timed(decode_block, as_binary),
+        "binary full": timed(lambda raw: decode_block(raw).data, as_binary),
+    }
+    json_size = sum(len(text.encode()) for text in as_json) / len(blocks)
+    binary_size = sum(len(raw) for raw in as_binary) / len(blocks)
+    print(f"{args.blocks} blocks of {args.txs} transactions")
+    print(f"  size: json data column {json_size:.0f} B, binary block {binary_size:.0f} B "
+          f"({binary_size / json_size:.2f}x; binary also holds the header and hash)")
+    for name, seconds in results.items():
+        print(f"  {name:20s} {seconds * 1e6:9.1f} us/block")
+
+
+def bench_compression(args):
+    """Compare stored block size and decode time per tx-section codec."""
+    blocks = sample_blocks(args.blocks, args.txs)
+    print(f"{args.blocks} blocks of {args.txs} transactions")
+    raw_size = None
+    for codec in (None, "zlib", "lzma"):
+        encoded = [encode_block(block, codec) for block in blocks]
+        size = sum(len(raw) for raw in encoded) / len(blocks)
+        raw_size = raw_size or size
+        header = timed(decode_block, encoded)
+        full = timed(lambda raw: decode_block(raw).data, encoded)
+        print(f"  {codec or 'none':5s} {size:8.0f} B/block (ratio {raw_size / size:.2f}), "
+              f"decode header {header * 1e6:.1f} us, full {full * 1e6:.1f} us")
+
+
+def legacy_hash(block):
+    """The f-string hash Block.calculate_hash computed before the canonical header."""
+    block_string = f"{block.block_index}{block.previous_hash}{block.timestamp}{json.dumps(block.data)}{block.proposer}{block.proof_of_accuracy}"
+    return hashlib.sha256(block_string.encode()).hexdigest()
+
+
+def bench_block(args):
+    """Cost per block of construction, hashing and to_dict."""
+    blocks = sample_blocks(args.blocks, args.txs)
+    fields = [(b.block_index, b.previous_hash, b.timestamp, b.data, b.proposer, b.proof_of_accuracy) for b in blocks]
+    results = {
+        "construct": timed(lambda f: Block(*f), fields),
+        "legacy hash (every call)": timed(legacy_hash, blocks),
+        "hash, first call": timed(lambda b: b.hash, blocks),
+        "hash, cached": timed(lambda b: b.hash, blocks),
+        "to_dict, first call": timed(lambda b: b.to_dict(), blocks),
+        "to_dict, cached": timed(lambda b: b.to_dict(), blocks),
+    }
+    print(f"{args.blocks} blocks of {args.txs} transactions")
+    for name, seconds in results.items():
+        print(f"  {name:25s} {seconds * 1e6:9.2f} us/block")
+
+
+async def load(session, method, url, clients, retries=0):
+    """Send each client's bodies in order, all clients at once.
+
+    A body that is not accepted is sent again up to `retries` times.
+    Returns the latency of every request, counts per status, the number
+    of bodies accepted and the wall time.
+    """
+    latencies, statuses = [], {}
+    accepted = 0
+
+    async def client(bodies):
+        nonlocal accepted
+        for body in bodies:
+            for _ in range(retries + 1):
+                start = time.perf_counter()
+                async with session.request(method, url, json=body) as response:
+                    await response.read()
+                latencies.append(time.perf_counter() - start)
+                statuses[response.status] = statuses.get(response.status, 0) + 1
+                if response.status == 200:
+                    accepted += 1
+                    break
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(bodies) for bodies in clients))
+    return sorted(latencies), statuses, accepted, time.perf_counter() - start
+
+
+def report(name, latencies, statuses, accepted, elapsed):
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"  {name:15s} {len(latencies) / elapsed:8.1f} req/s, p50 {latencies[len(latencies) // 2] * 1e3:7.1f} ms, "
+          f"p99 {p99 * 1e3:7.1f} ms, {accepted / elapsed:8.1f} accepted/s, statuses {dict(sorted(statuses.items()))}")
+
+
+async def bench_api_async(args):
+    if not os.path.exists(args.key):
+        raise SystemExit(f"Operator key file not found: {args.key}")
+    operator = load_signing_key(args.key)
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=args.concurrency)) as session:
+        async def get(path):
+            async with session.get(f"{args.url}{path}") as response:
+                return await response.json()
+
+        # Fund one wallet per concurrent client, so their nonces do not collide
+        wallets = [SigningKey.generate() for _ in range(args.concurrency)]
+        nonce = (await get(f"/balance/{address_of(operator)}"))["nonce"]
+        funding = []
+        for i, wallet in enumerate(wallets):
+            tx = {"tx_id": f"FUND-{address_of(wallet)}", "sender": address_of(operator),
+                  "receiver": address_of(wallet), "amount": args.requests, "fee": 0, "nonce": nonce + i}
+            funding.append(dict(tx, signature=sign_transaction(tx, operator)))
+        async with session.post(f"{args.url}/propose_block", json={
+                "proposer": address_of(operator), "data": funding,
+                "poa_proof": [{"tx_id": "GENESIS", "transaction": "GENESIS_PoA"}]}) as response:
+            if response.status != 200:
+                raise SystemExit(f"Funding the bench wallets failed: {await response.text()}")
+
+        # /vote: a valid next block, voted on over and over
+        tip = (await get("/recent_blocks"))[0]
+        params = {"from": max(1, tip["block_index"] - POA_WINDOW + 1)}
+        async with session.get(f"{args.url}/blocks", params=params) as response:
+            window = [json.loads(line) for line in (await response.text()).splitlines()]
+        block = Block(tip["block_index"] + 1, tip["hash"], time.time(), [], "bench",
+                      poa_from_hashes([b["hash"] for b in window]))
+        vote = {"block": block.to_dict(), "poa_proof": [{"tx_id": "GENESIS", "transaction": "GENESIS_PoA"}]}
+        print(f"{args.requests} requests per endpoint, {args.concurrency} concurrent clients")
+        per_client = args.requests // args.concurrency
+        report("/vote", *await load(session, "POST", f"{args.url}/vote", [[vote] * per_client] * args.concurrency))
+
+        # /propose_block: each client proposes one transfer at a time from its own
+        # wallet. Proposals racing for the same height lose with 409 or a rejected
+        # vote and are retried, so accepted/s is the committed block rate.
+        clients = []
+        for wallet in wallets:
+            bodies = []
+            for nonce in range(per_client):
+                tx = {"tx_id": f"BENCH-{address_of(wallet)[:16]}-{nonce}", "sender": address_of(wallet),
+                      "receiver": "bench", "amount": 1, "fee": 0, "nonce": nonce}
+                bodies.append({"proposer": "bench", "data": [dict(tx, signature=sign_transaction(tx, wallet))],
+                               "poa_proof": [{"tx_id": tx["tx_id"], "transaction": tx}]})
+            clients.append(bodies)
+        report("/propose_block", *await load(session, "POST", f"{args.url}/propose_block", clients, retries=100))
+
+
+def bench_api(args):
+    """Requests/s and latency of /vote and /propose_block on a running node."""
+    asyncio.run(bench_api_async(args))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    encoding = commands.add_parser("encoding", help=bench_encoding.__doc__)
+    encoding.add_argument("--blocks", type=int, default=2000)
+    encoding.add_argument("--txs", type=int, default=50)
+    encoding.set_defaults(run=bench_encoding)
+    compression = commands.add_parser("compression", help=bench_compression.__doc__)
+    compression.add_argument("--blocks", type=int, default=2000)
+    compression.add_argument("--txs", type=int, default=50)
+    compression.set_defaults(run=bench_compression)
+    block = commands.add_parser("block", help=bench_block.__doc__)
+    block.add_argument("--blocks", type=int, default=2000)
+    block.add_argument("--txs", type=int, default=50)
+    block.set_defaults(run=bench_block)
+    api = commands.add_parser("api", help=bench_api.__doc__)
+    api.add_argument("--url", default="http://localhost:5000")
+    api.add_argument("--key", required=True, help="the node's operator key file, to fund bench wallets")
+    api.add_argument("--requests", type=int, default=500)
+    api.add_argument("--concurrency", type=int, default=16)
+    api.set_defaults(run=bench_api)
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+import hashlib
+import json
+import lzma
+import struct
+import zlib
+from typing import Optional
+
+# Binary block encoding, as stored in the database's data column:
+# header (format version, block_index, timestamp, tx count), then the
+# previous_hash, proposer, proof_of_accuracy (as JSON) and hash fields,
+# then a codec byte and the transactions, each a canonical JSON record.
+# Strings and records are length-prefixed; NULL_LENGTH marks a None field.
+# Version 1 blocks have no codec byte and are never compressed.
+BLOCK_FORMAT_VERSION = 2
+BLOCK_HEADER = struct.Struct("<BqdI")
+LENGTH_PREFIX = struct.Struct("<I")
+NULL_LENGTH = 0xFFFFFFFF
+
+# Codecs the tx records may be compressed with, as one section.
+CODEC_NONE = 0
+CODECS = {
+    "zlib": (1, zlib.compress, zlib.decompress),
+    "lzma": (2, lzma.compress, lzma.decompress),
+}
+DECOMPRESSORS = {codec_id: decompress for codec_id, _, decompress in CODECS.values()}
+
+
+class Block:
+    """A block. Immutable once built, so its header encoding, hash and dict
+    form are each computed at most once and then cached.
+
+    The `data` list and the `to_dict()` result are shared; callers must not
+    mutate them.
+    """
+
+    __slots__ = (
+        "block_index", "previous_hash", "timestamp", "proposer", "proof_of_accuracy",
+        "_data", "_tx_view", "_tx_codec", "_tx_count", "_levels", "_header", "_hash", "_dict",
+    )
+
+    def __init__(self, block_index: int, previous_hash: str, timestamp: float, data: list, proposer: str,
+                 proof_of_accuracy: Optional[str] = None, block_hash: Optional[str] = None):
+        init = object.__setattr__
+        init(self, "block_index", block_index)
+        init(self, "previous_hash", previous_hash)
+        init(self, "timestamp", timestamp)
+        init(self, "proposer", proposer)
+        init(self, "proof_of_accuracy", proof_of_accuracy)
+        init(self, "_data", data)
+        init(self, "_tx_view", None)
+        init(self, "_tx_codec", CODEC_NONE)
+        init(self, "_tx_count", len(data) if data is not None else 0)
+        init(self, "_levels", None)
+        init(self, "_header", None)
+        # A hash stored with the block is trusted, not recomputed.
+        init(self, "_hash", block_hash)
+        init(self, "_dict", None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Block is immutable, cannot set {name}")
+
+    @property
+    def data(self) -> list:
+        """The block's transactions, decoded from the encoded tx records on first access."""
+        if self._tx_view is not None:
+            view = self._tx_view
+            if self._tx_codec != CODEC_NONE:
+                view = memoryview(DECOMPRESSORS[self._tx_codec](view))
+            object.__setattr__(self, "_data", _decode_transactions(view, self._tx_count))
+            object.__setattr__(self, "_tx_view", None)
+        return self._data
+
+    @property
+    def tx_count(self) -> int:
+        """Number of transactions, known without decoding them."""
+        return self._tx_count
+
+    def header(self) -> bytes:
+        """The canonical header encoding the block hash is taken over."""
+        if self._header is None:
+            object.__setattr__(self, "_header", self._encode_header())
+        return self._header
+
+    def _encode_header(self) -> bytes:
+        # Fixed timestamp precision and sorted compact JSON, so every node
+        # encodes the same block to the same bytes.
+        return canonical_json({
+            "block_index": self.block_index,
+            "previous_hash": self.previous_hash,
+            "timestamp": f"{self.timestamp:.6f}",
+            "proposer": self.proposer,
+            "proof_of_accuracy": self.proof_of_accuracy,
+            "merkle_root": self.merkle_root,
+        }).encode()
+
+    def merkle_levels(self) -> list:
+        """The Merkle tree over the transactions, leaves first, built once."""
+        if self._levels is None:
+            object.__setattr__(self, "_levels", merkle_levels(self.data))
+        return self._levels
+
+    @property
+    def merkle_root(self) -> str:
+        return merkle_root(self.merkle_levels())
+
+    @property
+    def hash(self) -> str:
+        """The block hash, computed from the canonical header on first use."""
+        if self._hash is None:
+            object.__setattr__(self, "_hash", self.calculate_hash())
+        return self._hash
+
+    def calculate_hash(self) -> str:
+        """Recompute the SHA-256 hash of the canonical header, ignoring any stored hash."""
+        return hashlib.sha256(self.header()).hexdigest()
+
+    def to_dict(self) -> dict:
+        """Convert block attributes to dictionary format."""
+        if self._dict is None:
+            object.__setattr__(self, "_dict", {
+                "block_index": self.block_index,
+                "previous_hash": self.previous_hash,
+                "timestamp": self.timestamp,
+                "data": self.data,
+                "proposer": self.proposer,
+                "proof_of_accuracy": self.proof_of_accuracy,
+                "hash": self.hash
+            })
+        return self._dict
+
+
+def _encode_field(value: Optional[str]) -> bytes:
+    if value is None:
+        return LENGTH_PREFIX.pack(NULL_LENGTH)
+    raw = value.encode()
+    return LENGTH_PREFIX.pack(len(raw)) + raw
+
+
+def _decode_field(view: memoryview, offset: int):
+    (length,) = LENGTH_PREFIX.unpack_from(view, offset)
+    offset += LENGTH_PREFIX.size
+    if length == NULL_LENGTH:
+        return None, offset
+    return str(view[offset:offset + length], "utf-8"), offset + length
+
+
+def _decode_transactions(view: memoryview, count: int) -> list:
+    # Records are JSON values, so one parse of the joined records as an
+    # array is much cheaper than a json.loads per record.
+    records = []
+    offset = 0
+    for _ in range(count):
+        (length,) = LENGTH_PREFIX.unpack_from(view, offset)
+        offset += LENGTH_PREFIX.size
+        records.append(view[offset:offset + length])
+        offset += length
+    return json.loads(b"[" + b",".join(records) + b"]")
+
+
+def _leaf_hash(tx) -> bytes:
+    # Leaves and inner nodes are hashed with different prefixes, so an inner
+    # node can never be passed off as a transaction.
+    return hashlib.sha256(b"\x00" + canonical_json(tx).encode()).digest()
+
+
+def _node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def merkle_levels(transactions: list) -> list:
+    """Every level of the Merkle tree, leaves first; odd levels are padded with their last hash."""
+    level = [_leaf_hash(tx) for tx in transactions]
+    levels = [level]
+    while len(level) > 1:
+        if len(level) % 2:
+            level.append(level[-1])
+        level = [_node_hash(level[i], level[i + 1]) for i in range(0, len(level), 2)]
+        levels.append(level)
+    return levels
+
+
+def merkle_root(levels: list) -> str:
+    """Hex root of a tree from merkle_levels; an empty block has the hash of no bytes."""
+    if not levels[0]:
+        return hashlib.sha256(b"").hexdigest()
+    return levels[-1][0].hex()
+
+
+def compute_merkle_root(transactions: list) -> str:
+    return merkle_root(merkle_levels(transactions))
+
+
+def merkle_proof(levels: list, position: int) -> list:
+    """Sibling hashes from leaf to root, as [hex hash, sibling is on the left] pairs."""
+    proof = []
+    for level in levels[:-1]:
+        sibling = position ^ 1
+        proof.append([level[sibling].hex(), sibling < position])
+        position //= 2
+    return proof
+
+
+def verify_merkle_proof(tx: dict, proof: list, root: str) -> bool:
+    """Check that `tx` is under Merkle root `root`, given its proof and nothing else of the block."""
+    node = _leaf_hash(tx)
+    for sibling_hex, sibling_is_left in proof:
+        sibling = bytes.fromhex(sibling_hex)
+        node = _node_hash(sibling, node) if sibling_is_left else _node_hash(node, sibling)
+    return node.hex() == root
+
+
+def verify_transaction_proof(tx: dict, proof: list, header: str, block_hash: str) -> bool:
+    """Check a /proof response against a block hash the wallet already trusts.
+
+    `header` is the block's canonical header; it must hash to `block_hash`,
+    and its merkle_root must be the root `proof` leads to from `tx`.
+    """
+    if hashlib.sha256(header.encode()).hexdigest() != block_hash:
+        return False
+    return verify_merkle_proof(tx, proof, json.loads(header)["merkle_root"])
+
+
+# One shared encoder: json.dumps builds a new encoder per call when given options.
+_CANONICAL_ENCODER = json.JSONEncoder(sort_keys=True, separators=(",", ":"))
+
+
+def canonical_json(value) -> str:
+    """JSON with sorted keys and no whitespace, so equal values encode identically."""
+    return _CANONICAL_ENCODER.encode(value)
+
+
+def encode_block(block: Block, compression: Optional[str] = None, min_size: int = 0) -> bytes:
+    """Encode a block in the binary format read by decode_block.
+
+    With `compression` ("zlib" or "lzma"), tx sections of at least
+    `min_size` bytes are compressed, unless that does not make them smaller.
+    """
+    poa = None if block.proof_of_accuracy is None else canonical_json(block.proof_of_accuracy)
+    records = []
+    for tx in block.data:
+        raw = canonical_json(tx).encode()
+        records.append(LENGTH_PREFIX.pack(len(raw)))
+        records.append(raw)
+    section = b"".join(records)
+    codec = CODEC_NONE
+    if compression is not None and len(section) >= min_size:
+        codec_id, compress, _ = CODECS[compression]
+        compressed = compress(section)
+        if len(compressed) < len(section):
+            section, codec = compressed, codec_id
+    return b"".join([
+        BLOCK_HEADER.pack(BLOCK_FORMAT_VERSION, block.block_index, block.timestamp, block.tx_count),
+        _encode_field(block.previous_hash),
+        _encode_field(block.proposer),
+        _encode_field(poa),
+        _encode_field(block.hash),
+        bytes((codec,)),
+        section,
+    ])
+
+
+def decode_block(buffer) -> Block:
+    """Decode an encoded block without copying it.
+
+    Only the header fields are parsed here; the transactions stay a view
+    into `buffer`, compressed or not, until Block.data is first read.
+    """
+    view = memoryview(buffer)
+    version, block_index, timestamp, tx_count = BLOCK_HEADER.unpack_from(view, 0)
+    if version not in (1, BLOCK_FORMAT_VERSION):
+        raise ValueError(f"Unsupported block format version {version}")
+    offset = BLOCK_HEADER.size
+    previous_hash, offset = _decode_field(view, offset)
+    proposer, offset = _decode_field(view, offset)
+    poa, offset = _decode_field(view, offset)
+    block_hash, offset = _decode_field(view, offset)
+    block = Block(block_index, previous_hash, timestamp, None,
+                  proposer, None if poa is None else json.loads(poa), block_hash)
+    codec = CODEC_NONE
+    if version >= 2:
+        codec = view[offset]
+        offset += 1
+        if codec != CODEC_NONE and codec not in DECOMPRESSORS:
+            raise ValueError(f"Unknown block codec {codec}")
+    object.__setattr__(block, "_tx_view", view[offset:])
+    object.__setattr__(block, "_tx_count", tx_count)
+    object.__setattr__(block, "_tx_codec", codec)
+    return block
@@ -0,0 +1,142 @@
+import time
+from block import Block
+from transaction import signature_verifier
+import database
+
+TX_FIELDS = ("tx_id", "sender", "receiver", "amount", "fee", "nonce", "signature")
+
+# Rejection reason for a transaction that may become valid once the sender's
+# earlier transactions are committed.
+NONCE_AHEAD = "Nonce is ahead of the sender's next one"
+
+async def init_blockchain(allocations=None):
+    """Initialize blockchain and ensure the first block exists.
+
+    `allocations` maps addresses to their starting balances, which the
+    genesis block credits as transfers from database.GENESIS_SENDER.
+    """
+    if await database.is_blockchain_empty():
+        print("[INFO] No existing blockchain found. Initializing genesis block...")
+        genesis_block = Block(
+            block_index=1,
+            previous_hash="0",
+            timestamp=time.time(),
+            data=[
+                {"tx_id": f"GENESIS-{address}", "sender": database.GENESIS_SENDER,
+                 "receiver": address, "amount": amount, "fee": 0}
+                for address, amount in (allocations or {}).items()
+            ],
+            proposer="GENESIS",
+            proof_of_accuracy="GENESIS_PoA"
+        )
+        if await database.insert_block(genesis_block):
+            print(f"[INFO] Genesis Block Created: {genesis_block.to_dict()}")
+        else:
+            print("[ERROR] Failed to insert Genesis block.")
+    else:
+        print("[INFO] Blockchain already exists.")
+
+async def get_latest_block():
+    """Retrieve the latest block from the blockchain as a Block object.
+
+    The block is shared with the recent-block cache and must not be mutated;
+    its transactions are only decoded if `data` is read.
+    """
+    recent = await database.get_recent_blocks(1)
+    if not recent:
+        print("[ERROR] No blocks found in the blockchain.")
+        return None  # Return None if no block exists
+    return recent[0]
+
+def get_blockchain(after_index=0, limit=None):
+    """Iterate over the blockchain in order, a page of blocks at a time."""
+    return database.iter_blocks(after_index, limit)
+
+async def get_blockchain_stats():
+    """Retrieve blockchain statistics for the explorer from the running totals."""
+    return await database.get_chain_stats()
+
+def check_transaction_format(tx):
+    """Return why `tx` is malformed, or None if it is well formed."""
+    if not isinstance(tx, dict) or not all(k in tx for k in TX_FIELDS):
+        return "Invalid transaction format"
+    if not all(isinstance(tx[k], str) for k in ("tx_id", "sender", "receiver", "signature")):
+        return "Invalid transaction format"
+    amount, fee = tx["amount"], tx["fee"]
+    if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in (amount, fee)):
+        return "Invalid transaction amounts"
+    if amount <= 0 or fee < 0:
+        return "Invalid transaction amounts"
+    if not isinstance(tx["nonce"], int) or isinstance(tx["nonce"], bool):
+        return "Invalid transaction nonce"
+    if tx["sender"] == database.GENESIS_SENDER:
+        return "Reserved sender address"
+    return None
+
+async def screen_transactions(txs):
+    """Check candidate transactions against each other and the committed chain.
+
+    Returns (accepted, rejected). `accepted` are the transactions one block
+    can include, each sender's in nonce order starting at its committed
+    nonce; `rejected` maps every other tx_id to the reason, NONCE_AHEAD for
+    ones that wait on an earlier nonce. Signatures are verified in one batch
+    and spent ids looked up in one query; database errors propagate.
+    """
+    rejected = {}
+    candidates = {}
+    for tx in txs:
+        reason = check_transaction_format(tx)
+        if reason is not None:
+            if isinstance(tx, dict) and isinstance(tx.get("tx_id"), str):
+                rejected[tx["tx_id"]] = reason
+            continue
+        if tx["tx_id"] in candidates:
+            rejected[tx["tx_id"]] = "Duplicate transaction"
+            continue
+        candidates[tx["tx_id"]] = tx
+
+    for tx, valid in zip(list(candidates.values()), await signature_verifier.verify(list(candidates.values()))):
+        if not valid:
+            rejected[tx["tx_id"]] = "Invalid signature"
+            del candidates[tx["tx_id"]]
+
+    for tx_id in await database.spent_transactions(list(candidates)):
+        rejected[tx_id] = "Double spend"
+        del candidates[tx_id]
+
+    by_sender = {}
+    for tx in candidates.values():
+        by_sender.setdefault(tx["sender"], []).append(tx)
+    accounts = await database.get_accounts(list(by_sender))
+    accepted = []
+    for sender, sender_txs in by_sender.items():
+        nonce, balance = accounts[sender]["nonce"], accounts[sender]["balance"]
+        blocked = False  # an unaffordable transaction holds back the sender's later ones
+        for tx in sorted(sender_txs, key=lambda tx: tx["nonce"]):
+            if tx["nonce"] < nonce:
+                rejected[tx["tx_id"]] = f"Invalid nonce, expected {nonce}"
+            elif blocked or tx["nonce"] > nonce:
+                rejected[tx["tx_id"]] = NONCE_AHEAD
+            elif tx["amount"] + tx["fee"] > balance:
+                rejected[tx["tx_id"]] = "Insufficient balance"
+                blocked = True
+            else:
+                accepted.append(tx)
+                balance -= tx["amount"] + tx["fee"]
+                nonce += 1
+    return accepted, rejected
+
+async def approve_and_add_block(new_block, tx_data):
+    """Add a block to the blockchain with atomicity. Returns whether it was committed."""
+    success = False
+    try:
+        # insert_block writes each transaction row, which is the spent marker
+        # is_transaction_spent checks, in the same batch as the block.
+        success = await database.insert_block(new_block)
+        if success:
+            print(f"[INFO] Block {new_block.block_index} committed successfully.")
+        else:
+            print("[ERROR] Block commit failed.")
+    except Exception as e:
+        print(f"[ERROR] Block commit failed: {e}")
+    return success
@@ -0,0 +1,144 @@
+import asyncio
+import hashlib
+import threading
+from collections import deque
+import database
+
+# Number of most recent block hashes the Proof of Accuracy covers.
+POA_WINDOW = 5
+
+
+def poa_from_hashes(hashes):
+    """PoA over block hashes given oldest first."""
+    return hashlib.sha256(",".join(hashes).encode()).hexdigest()
+
+
+class PoAWindow:
+    """Rolling window of recent block hashes with the PoA they produce.
+
+    Equivalent to compute_poa over the last `size` committed blocks, but kept
+    up to date by database commits instead of re-reading and re-hashing the
+    history on every call.
+    """
+
+    def __init__(self, size=POA_WINDOW):
+        self.blocks = deque(maxlen=size)  # (block_index, hash), oldest first
+        self.loaded = False
+        # Bumped by every commit, so a load can tell that one raced with it.
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._poa = None
+
+    @property
+    def hashes(self):
+        return [block_hash for _, block_hash in self.blocks]
+
+    def push(self, block):
+        """Add a committed block (as stored) to the window."""
+        with self._lock:
+            self.generation += 1
+            if not self.loaded:
+                return
+            # A load that read the block already holds it.
+            if any(index == block.block_index for index, _ in self.blocks):
+                return
+            # Commits from different threads may report out of order.
+            ordered = sorted([*self.blocks, (block.block_index, block.hash)])
+            self.blocks.clear()
+            self.blocks.extend(ordered)
+            self._poa = None
+
+    async def load(self):
+        """Fill the window from the database; later commits keep it current.
+
+        A commit that lands while the blocks are being read is not pushed
+        into the window (it is not loaded yet) and may be missing from the
+        read, so the read is retried until no commit raced with it.
+        """
+        while True:
+            generation = self.generation
+            recent = await database.get_recent_blocks(limit=self.blocks.maxlen)
+            with self._lock:
+                if generation == self.generation:
+                    self.blocks.clear()
+                    self.blocks.extend((block.block_index, block.hash) for block in reversed(recent))
+                    self._poa = None
+                    self.loaded = True
+                    return
+
+    async def has_history(self):
+        if not self.loaded:
+            await self.load()
+        return bool(self.blocks)
+
+    async def expected(self):
+        """Return the PoA the next block must carry."""
+        if not self.loaded:
+            await self.load()
+        with self._lock:
+            if self._poa is None:
+                self._poa = poa_from_hashes(self.hashes)
+            return self._poa
+
+
+poa_window = PoAWindow()
+database.commit_listeners.append(poa_window.push)
+
+async def generate_poa(recent_blocks):
+    """Generate Proof of Accuracy (PoA) from recent blocks."""
+    if not recent_blocks:
+        return [{"tx_id": "GENESIS", "transaction": "GENESIS_PoA"}]
+
+    poa_proof = []
+    for block in recent_blocks:
+        for tx in block.get("data", []):  # Ensure transactions exist
+            if isinstance(tx, dict) and "tx_id" in tx:
+                poa_proof.append({"tx_id": tx["tx_id"], "transaction": tx})
+
+    return poa_proof
+
+async def verify_poa_proof(poa_proof):
+    """Verify the Proof of Accuracy from proposer."""
+    if not isinstance(poa_proof, list):
+        print("[ERROR] PoA proof is not a list.")
+        return False
+
+    for poa_entry in poa_proof:
+        if not isinstance(poa_entry, dict) or "tx_id" not in poa_entry or "transaction" not in poa_entry:
+            print(f"[ERROR] Invalid PoA entry: {poa_entry}")
+            return False
+
+    return True
+
+async def validate_block_poa(block_data):
+    """Validate Proof of Accuracy (PoA) for a received block."""
+    poa = block_data.get("proof_of_accuracy")
+    if not poa:
+        print("[ERROR] Block missing Proof of Accuracy.")
+        return False
+
+    if not await poa_window.has_history():
+        return True  # If no history, assume first few blocks bootstrap the chain
+
+    expected_poa = await poa_window.expected()
+    is_valid = (poa == expected_poa)
+
+    if not is_valid:
+        print(f"[ERROR] Invalid Proof of Accuracy for block {block_data['block_index']}")
+
+    return is_valid
+
+async def compute_poa(history):
+    """Generate deterministic PoA hash from recent block history."""
+    try:
+        # Ensure history is sorted based on 'block_index' key
+        sorted_history = sorted(history, key=lambda x: x["block_index"] if isinstance(x, dict) else x.block_index)
+
+        # Collect the block hashes, oldest first
+        hashes = [str(b["hash"]) if isinstance(b, dict) else b.hash for b in sorted_history]
+
+        # Compute SHA-256 hash
+        return poa_from_hashes(hashes)
+    except Exception as e:
+        print(f"[ERROR] Failed to compute PoA: {e}")
+        return "INVALID_PoA"
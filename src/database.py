@@ -0,0 +1,805 @@
+import asyncio
+import hashlib
+import json
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+import libsql_client
+from block import Block, decode_block, encode_block, merkle_proof
+
+DB_PATH = "blockchain.db"
+
+# Timing of block commits, for comparing commit paths.
+commit_stats = {"commits": 0, "total_ms": 0.0, "last_ms": 0.0}
+
+# Group commit: concurrent writes are merged into one batch of at most
+# WRITE_BATCH_MAX submissions, collected for up to WRITE_FLUSH_INTERVAL seconds.
+WRITE_BATCH_MAX = 64
+WRITE_FLUSH_INTERVAL = 0.002
+
+# Blocks read per query while migrating databases written by older nodes.
+MIGRATION_PAGE_SIZE = 500
+
+# Transactions returned per page of an address history.
+ADDRESS_PAGE_SIZE = 100
+
+# Codec for the tx section of stored blocks ("zlib", "lzma" or None for raw).
+# Sections shorter than BLOCK_COMPRESS_MIN_BYTES rarely shrink and stay raw.
+BLOCK_COMPRESSION = "zlib"
+BLOCK_COMPRESS_MIN_BYTES = 256
+
+# Blocks fetched per query when streaming the chain.
+BLOCK_PAGE_SIZE = 500
+
+# Number of latest transactions reported with the chain statistics.
+RECENT_TX_LIMIT = 5
+
+# Sender of genesis allocations; these credit the receiver without a debit.
+GENESIS_SENDER = "GENESIS"
+
+# Number of most recent decoded blocks kept in memory.
+RECENT_CACHE_SIZE = 16
+
+# Older blocks kept, with their Merkle levels, for repeated proof requests.
+PROOF_CACHE_SIZE = 128
+
+# Spent-set Bloom filter: sized for this many tx ids (or twice the ids on disk,
+# if more) at this false-positive rate. A false positive costs one query.
+SPENT_FILTER_CAPACITY = 1_000_000
+SPENT_FILTER_FP_RATE = 0.001
+
+# Tx ids looked up per IN (...) query, below SQLite's bound-parameter limit.
+SPENT_QUERY_CHUNK = 500
+
+
+class WriteQueue:
+    """Write-behind queue that merges concurrent writes into group commits.
+
+    The writer is a task on the event loop the node serves from, the one
+    every read runs on too. The file-backed client runs each call to
+    completion without yielding, so reads never overlap a commit and
+    SQLite never finds the database busy.
+    """
+
+    def __init__(self, max_batch=WRITE_BATCH_MAX, flush_interval=WRITE_FLUSH_INTERVAL):
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.last_batch_size = 0
+        self.batches = 0
+        self.writes = 0
+        self._queue = None
+        self._loop = None
+        self._task = None
+
+    @property
+    def depth(self):
+        """Number of submitted writes waiting for the next group commit."""
+        return self._queue.qsize() if self._queue else 0
+
+    def start(self):
+        """Start the writer on the running loop unless it is already running there."""
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._task = loop.create_task(self._run(self._queue))
+
+    async def stop(self):
+        """Flush pending writes and stop the writer."""
+        task, self._task = self._task, None
+        if task is None or task.done():
+            return
+        # The sentinel queues behind every pending write, so they commit first.
+        self._queue.put_nowait(None)
+        await task
+        # Fail writes that raced with stop() instead of leaving them waiting.
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:
+                item[1].set_exception(RuntimeError("write queue stopped"))
+
+    async def submit(self, statements):
+        """Queue a list of statements and wait until they are committed."""
+        self.start()
+        future = self._loop.create_future()
+        self._queue.put_nowait((statements, future))
+        return await future
+
+    async def _run(self, queue):
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            batch = [item]
+            if queue.qsize() < self.max_batch - 1:
+                await asyncio.sleep(self.flush_interval)
+            stopping = False
+            while len(batch) < self.max_batch and not queue.empty():
+                item = queue.get_nowait()
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._commit(batch)
+            if stopping:
+                return
+
+    async def _commit(self, batch):
+        """Commit a batch as one transaction, isolating failures per write."""
+        self.last_batch_size = len(batch)
+        self.batches += 1
+        self.writes += len(batch)
+        try:
+            results = await client.batch([stmt for statements, _ in batch for stmt in statements])
+        except Exception:
+            # One bad write (e.g. a duplicate tx id) must not fail the others.
+            for statements, future in batch:
+                try:
+                    future.set_result(await client.batch(statements))
+                except Exception as e:
+                    future.set_exception(e)
+            return
+        offset = 0
+        for statements, future in batch:
+            future.set_result(results[offset:offset + len(statements)])
+            offset += len(statements)
+
+
+write_queue = WriteQueue()
+
+
+class BlockCache:
+    """Write-through cache of the tip and a window of recent decoded blocks.
+
+    Loaded from the database on first use, then kept current by insert_block,
+    so tip and recent-block reads do no I/O. Cached blocks are shared; callers
+    must not mutate them.
+    """
+
+    def __init__(self, size=RECENT_CACHE_SIZE):
+        self.blocks = deque(maxlen=size)
+        self.loaded = False
+        self.hits = 0
+        self.misses = 0
+        # Bumped by every commit, so a load can tell that one raced with it.
+        self.generation = 0
+
+    def recent(self, limit):
+        """Return up to `limit` newest blocks, newest first, or None on a miss."""
+        if not self.loaded or limit > self.blocks.maxlen:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return list(reversed(self.blocks))[:limit]
+
+    def fill(self, newest_first, generation):
+        """Load blocks read at `generation`; refused if a commit landed since."""
+        if generation != self.generation:
+            return False
+        self.blocks.clear()
+        self.blocks.extend(reversed(newest_first))
+        self.loaded = True
+        return True
+
+    def get(self, block_index):
+        """The cached block at `block_index`, or None."""
+        for block in list(self.blocks):
+            if block.block_index == block_index:
+                return block
+        return None
+
+    def push(self, block):
+        self.generation += 1
+        if not self.loaded:
+            return
+        # A load that read the row before its push already holds the block.
+        if any(cached.block_index == block.block_index for cached in self.blocks):
+            return
+        self.blocks.append(block)
+        if len(self.blocks) > 1 and self.blocks[-2].block_index > block.block_index:
+            ordered = sorted(self.blocks, key=lambda b: b.block_index)
+            self.blocks.clear()
+            self.blocks.extend(ordered)
+
+
+block_cache = BlockCache()
+
+# block_index -> Block, least recently proven first; guarded by proof_blocks_lock.
+proof_blocks = OrderedDict()
+proof_blocks_lock = threading.Lock()
+
+
+class SpentFilter:
+    """Bloom filter over the tx ids in the transactions table.
+
+    A miss means the tx id is certainly unspent; a hit only means it may be,
+    and has to be confirmed against the table. Ids are added before their
+    commit is submitted, so the filter never lags the table; a failed commit
+    only leaves a few extra false positives.
+    """
+
+    def __init__(self, capacity=SPENT_FILTER_CAPACITY, fp_rate=SPENT_FILTER_FP_RATE):
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.size = max(8, math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _positions(self, tx_id):
+        digest = hashlib.blake2b(str(tx_id).encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, tx_id):
+        for position in self._positions(tx_id):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, tx_id):
+        if all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(tx_id)):
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+
+spent_filter = SpentFilter()
+
+# Callables invoked with each committed block, as stored, after its commit.
+commit_listeners = []
+
+async def connect_db():
+    """Connect to the local Turso (libSQL) database."""
+    try:
+        client = libsql_client.create_client(f"file:{DB_PATH}")
+        return client
+    except Exception as e:
+        print(f"[ERROR] Failed to connect to Turso: {e}")
+        client = None
+        return client
+
+async def init_db():
+    global client
+    client = await connect_db()
+    """Initialize the database schema if it does not exist."""
+    if not client:
+        print("[ERROR] Database connection not initialized.")
+        return
+    
+    try:
+        await client.execute("""
+            CREATE TABLE IF NOT EXISTS blockchain (
+                block_index INTEGER PRIMARY KEY,
+                previous_hash TEXT,
+                timestamp INTEGER,
+                data TEXT,
+                proposer TEXT,
+                proof_of_accuracy TEXT
+            )
+        """)
+        await client.execute("""
+            CREATE TABLE IF NOT EXISTS metadata (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        """)
+        await client.execute("""
+            CREATE TABLE IF NOT EXISTS transactions (
+                tx_id TEXT PRIMARY KEY,
+                block_index INTEGER,
+                position INTEGER,
+                sender TEXT,
+                receiver TEXT,
+                amount REAL,
+                fee REAL
+            )
+        """)
+        await migrate_transaction_columns()
+        # Address history and per-block lookups walk these instead of the table
+        await client.execute(
+            "CREATE INDEX IF NOT EXISTS transactions_by_sender ON transactions (sender, block_index, position)"
+        )
+        await client.execute(
+            "CREATE INDEX IF NOT EXISTS transactions_by_receiver ON transactions (receiver, block_index, position)"
+        )
+        await client.execute(
+            "CREATE INDEX IF NOT EXISTS transactions_by_block ON transactions (block_index, position)"
+        )
+        await client.execute("""
+            CREATE TABLE IF NOT EXISTS accounts (
+                address TEXT PRIMARY KEY,
+                balance INTEGER NOT NULL DEFAULT 0,
+                nonce INTEGER NOT NULL DEFAULT 0
+            )
+        """)                 
+        # Overspends abort the whole commit batch they are part of
+        await client.execute("""
+            CREATE TRIGGER IF NOT EXISTS accounts_no_overdraft_update
+            BEFORE UPDATE OF balance ON accounts WHEN NEW.balance < 0
+            BEGIN SELECT RAISE(ABORT, 'insufficient balance'); END
+        """)
+        await backfill_accounts()
+        await client.execute("""
+            CREATE TABLE IF NOT EXISTS chain_stats (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                blocks INTEGER NOT NULL DEFAULT 0,
+                transactions INTEGER NOT NULL DEFAULT 0,
+                total_amount REAL NOT NULL DEFAULT 0,
+                total_fees REAL NOT NULL DEFAULT 0
+            )
+        """)
+        # Chains from older nodes get their totals computed once, here
+        await client.execute("""
+            INSERT OR IGNORE INTO chain_stats (id, blocks, transactions, total_amount, total_fees)
+            SELECT 1, (SELECT COUNT(*) FROM blockchain), COUNT(*), COALESCE(SUM(amount), 0), COALESCE(SUM(fee), 0)
+            FROM transactions WHERE block_index IS NOT NULL
+        """)
+
+        # Ensure last_block is tracked
+        await client.execute("INSERT OR IGNORE INTO metadata (key, value) VALUES ('last_block', '0')")
+        # Blocks carry their own index; only the one after the tip may be committed
+        await client.execute("""
+            CREATE TRIGGER IF NOT EXISTS blockchain_next_index
+            BEFORE INSERT ON blockchain
+            WHEN NEW.block_index != (SELECT CAST(value AS INTEGER) + 1 FROM metadata WHERE key = 'last_block')
+            BEGIN SELECT RAISE(ABORT, 'block index does not follow the tip'); END
+        """)
+        await load_spent_filter()
+        print("[Database] Initialization complete.")
+    except Exception as e:
+        print(f"[ERROR] Database initialization failed: {e}")
+
+async def migrate_transaction_columns():
+    """Rebuild a (tx_id, data) transactions table from older nodes with real columns.
+
+    Rows are re-derived from the blocks that contain them, in one transaction
+    and one page of blocks at a time. Spent markers that belong to no block
+    are kept as bare tx ids.
+    """
+    result = await client.execute("PRAGMA table_info(transactions)")
+    if "sender" in {row[1] for row in result.rows}:
+        return
+    print("[Database] Migrating transactions to indexed columns...")
+    transaction = client.transaction()
+    try:
+        await transaction.execute("ALTER TABLE transactions RENAME TO transactions_v1")
+        await transaction.execute("""
+            CREATE TABLE transactions (
+                tx_id TEXT PRIMARY KEY,
+                block_index INTEGER,
+                position INTEGER,
+                sender TEXT,
+                receiver TEXT,
+                amount REAL,
+                fee REAL
+            )
+        """)
+        after = 0
+        while True:
+            rows = (await transaction.execute(
+                "SELECT block_index, data FROM blockchain WHERE block_index > ? ORDER BY block_index ASC LIMIT ?",
+                (after, MIGRATION_PAGE_SIZE)
+            )).rows
+            for block_index, data in rows:
+                for stmt, args in _transaction_statements(_decode_data(data), block_index):
+                    await transaction.execute(stmt.replace("INSERT", "INSERT OR IGNORE", 1), args)
+            if len(rows) < MIGRATION_PAGE_SIZE:
+                break
+            after = rows[-1][0]
+        await transaction.execute(
+            "INSERT OR IGNORE INTO transactions (tx_id) SELECT tx_id FROM transactions_v1"
+        )
+        await transaction.execute("DROP TABLE transactions_v1")
+        await transaction.commit()
+    finally:
+        transaction.close()
+
+async def load_spent_filter():
+    """Rebuild the spent-set filter from the tx ids in the transactions table."""
+    global spent_filter
+    stored = (await client.execute("SELECT COUNT(*) FROM transactions")).rows[0][0]
+    spent_filter = SpentFilter(max(SPENT_FILTER_CAPACITY, 2 * stored), SPENT_FILTER_FP_RATE)
+    after = ""
+    while True:
+        rows = (await client.execute(
+            "SELECT tx_id FROM transactions WHERE tx_id > ? ORDER BY tx_id LIMIT ?",
+            (after, MIGRATION_PAGE_SIZE)
+        )).rows
+        for (tx_id,) in rows:
+            spent_filter.add(tx_id)
+        if len(rows) < MIGRATION_PAGE_SIZE:
+            break
+        after = rows[-1][0]
+
+def _transaction_statements(data, block_index):
+    """Statements inserting a block's transactions as transactions rows."""
+    stmt = """
+        INSERT INTO transactions (tx_id, block_index, position, sender, receiver, amount, fee)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """
+    return [
+        (stmt, (tx["tx_id"], block_index, position, tx.get("sender"), tx.get("receiver"),
+                tx.get("amount"), tx.get("fee")))
+        for position, tx in enumerate(data)
+        if isinstance(tx, dict) and "tx_id" in tx
+    ]
+
+def _stats_statement(data):
+    """Statement folding a block's transactions into the running chain_stats totals."""
+    txs = [tx for tx in data if isinstance(tx, dict) and "tx_id" in tx]
+    return ("""
+        UPDATE chain_stats SET blocks = blocks + 1, transactions = transactions + ?,
+            total_amount = total_amount + ?, total_fees = total_fees + ?
+        WHERE id = 1
+    """, (
+        len(txs),
+        sum(float(tx.get("amount", 0)) for tx in txs),
+        sum(float(tx.get("fee", 0)) for tx in txs),
+    ))
+
+async def is_blockchain_empty():
+    """Check if the blockchain database contains any blocks."""
+    try:
+        result = await client.execute("SELECT value FROM metadata WHERE key = 'last_block'")
+        last_block = result.rows[0][0] if result.rows else '0'
+        return last_block == '0'
+    except Exception as e:
+        print(f"[ERROR] Failed to check if blockchain is empty: {e}")
+        return True
+
+async def backfill_accounts():
+    """Replay committed transactions into an empty accounts table.
+
+    Chains written before balances were tracked have blocks but no accounts,
+    which would make every sender look broke. Balances and nonces are rebuilt
+    with one set-based INSERT; it does not pass through the overdraft trigger,
+    so overspends that older nodes let through stay visible as negative
+    balances instead of failing the startup.
+    """
+    if (await client.execute("SELECT 1 FROM accounts LIMIT 1")).rows:
+        return
+    if not (await client.execute("SELECT 1 FROM transactions WHERE sender IS NOT NULL LIMIT 1")).rows:
+        return
+    print("[Database] Backfilling account balances from committed transactions...")
+    await client.execute("""
+        INSERT INTO accounts (address, balance, nonce)
+        SELECT address, SUM(delta), SUM(sent) FROM (
+            SELECT receiver AS address, amount AS delta, 0 AS sent
+            FROM transactions WHERE block_index IS NOT NULL AND receiver IS NOT NULL
+            UNION ALL
+            SELECT sender, -(amount + COALESCE(fee, 0)), 1
+            FROM transactions WHERE block_index IS NOT NULL AND sender IS NOT NULL AND sender != ?
+            UNION ALL
+            SELECT b.proposer, t.fee, 0
+            FROM transactions t JOIN blockchain b ON b.block_index = t.block_index
+            WHERE t.sender IS NOT NULL AND t.sender != ? AND t.fee > 0
+        ) GROUP BY address
+    """, (GENESIS_SENDER, GENESIS_SENDER))
+
+def _account_statements(block):
+    """Statements applying a block's transfers and fees to the accounts table."""
+    credit = """
+        INSERT INTO accounts (address, balance) VALUES (?, ?)
+        ON CONFLICT(address) DO UPDATE SET balance = balance + excluded.balance
+    """
+    # The debit is an UPDATE so the overdraft trigger sees the new balance;
+    # the INSERT OR IGNORE makes sure there is a row for it to update.
+    open_account = "INSERT OR IGNORE INTO accounts (address) VALUES (?)"
+    debit = "UPDATE accounts SET balance = balance - ?, nonce = nonce + 1 WHERE address = ?"
+    statements = []
+    for tx in block.data:
+        if not isinstance(tx, dict) or not all(k in tx for k in ("sender", "receiver", "amount")):
+            continue
+        fee = tx.get("fee", 0)
+        if tx["sender"] != GENESIS_SENDER:
+            statements.append((open_account, (tx["sender"],)))
+            statements.append((debit, (tx["amount"] + fee, tx["sender"])))
+            if fee:
+                statements.append((credit, (block.proposer, fee)))
+        statements.append((credit, (tx["receiver"], tx["amount"])))
+    return statements
+
+def _block_statements(block, encoded):
+    """Statements committing one block, its transactions and the tip pointer."""
+    return [
+        ("""
+            INSERT INTO blockchain (block_index, previous_hash, timestamp, data, proposer, proof_of_accuracy)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (
+            block.block_index, block.previous_hash, block.timestamp, encoded,
+            block.proposer, block.proof_of_accuracy
+        )),
+        *_transaction_statements(block.data, block.block_index),
+        _stats_statement(block.data),
+        *_account_statements(block),
+        "UPDATE metadata SET value = CAST(value AS INTEGER) + 1 WHERE key = 'last_block'",
+    ]
+
+async def insert_block(block):
+    """Commit a block, its transactions and the tip pointer as one atomic batch."""
+    return await insert_blocks([block])
+
+async def insert_blocks(blocks):
+    """Commit a run of consecutive blocks as one atomic batch; all of them or none are stored."""
+    start = time.perf_counter()
+    try:
+        encoded = [encode_block(block, BLOCK_COMPRESSION, BLOCK_COMPRESS_MIN_BYTES) for block in blocks]
+        statements = []
+        for block, raw in zip(blocks, encoded):
+            statements.extend(_block_statements(block, raw))
+        tx_count = 0
+        for block in blocks:
+            for tx in block.data:
+                if isinstance(tx, dict) and "tx_id" in tx:
+                    spent_filter.add(tx["tx_id"])
+                    tx_count += 1
+        await write_queue.submit(statements)
+        for raw in encoded:
+            # The cached copy is decoded from the stored bytes, not shared with the caller
+            stored = decode_block(raw)
+            block_cache.push(stored)
+            for listener in commit_listeners:
+                listener(stored)
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        commit_stats["commits"] += 1
+        commit_stats["total_ms"] += elapsed_ms
+        commit_stats["last_ms"] = elapsed_ms
+        first, last = blocks[0].block_index, blocks[-1].block_index
+        label = f"Block {first}" if first == last else f"Blocks {first}-{last}"
+        print(f"[Database] {label} inserted with {tx_count} transactions in {elapsed_ms:.2f} ms.")
+        return True
+    except Exception as e:
+        print(f"[ERROR] Failed to insert block: {e}")
+        return False
+
+async def get_last_block():
+    """Retrieve the last block in the blockchain."""
+    recent = await get_recent_blocks(limit=1)
+    if not recent:
+        return None
+    block = recent[0]
+    return {
+        "block_index": block.block_index,
+        "previous_hash": block.previous_hash,
+        "timestamp": block.timestamp,
+        "data": block.data,
+        "proposer": block.proposer,
+        "proof_of_accuracy": block.proof_of_accuracy,
+        "hash": block.hash,
+    }
+
+def row_to_block(row):
+    """Decode a blockchain row; rows written before the binary encoding hold JSON text."""
+    if isinstance(row[3], bytes):
+        return decode_block(row[3])
+    return Block(
+        block_index=row[0],
+        previous_hash=row[1],
+        timestamp=row[2],
+        data=json.loads(row[3]),
+        proposer=row[4],
+        proof_of_accuracy=row[5],
+    )
+
+def _decode_data(value):
+    """Transactions of a stored data column, binary or legacy JSON."""
+    return decode_block(value).data if isinstance(value, bytes) else json.loads(value)
+
+async def get_blocks_page(after_index=0, limit=BLOCK_PAGE_SIZE):
+    """Retrieve up to `limit` blocks with block_index greater than `after_index`.
+
+    Errors propagate, so a stream built on pages fails visibly instead of
+    ending early.
+    """
+    result = await client.execute(
+        "SELECT * FROM blockchain WHERE block_index > ? ORDER BY block_index ASC LIMIT ?",
+        (after_index, limit)
+    )
+    return [row_to_block(row) for row in result.rows]
+
+async def iter_blocks(after_index=0, limit=None, page_size=BLOCK_PAGE_SIZE):
+    """Yield up to `limit` blocks after `after_index` in order, one keyset-paginated page at a time."""
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = page_size if remaining is None else min(remaining, page_size)
+        page = await get_blocks_page(after_index, size)
+        for block in page:
+            yield block
+        if len(page) < size:
+            return
+        after_index = page[-1].block_index
+        if remaining is not None:
+            remaining -= len(page)
+
+async def get_headers(after_index=0, limit=BLOCK_PAGE_SIZE):
+    """(block_index, previous_hash, hash) of up to `limit` blocks after `after_index`.
+
+    Stored blocks carry their hash, and their transactions are never decoded.
+    """
+    return [(block.block_index, block.previous_hash, block.hash)
+            for block in await get_blocks_page(after_index, limit)]
+
+async def get_recent_blocks(limit=5):
+    """Retrieve the last N blocks."""
+    cached = block_cache.recent(limit)
+    if cached is not None:
+        return cached
+    try:
+        fetch = max(limit, block_cache.blocks.maxlen)
+        while True:
+            generation = block_cache.generation
+            result = await client.execute("SELECT * FROM blockchain ORDER BY block_index DESC LIMIT ?", (fetch,))
+            recent_blocks = [row_to_block(row) for row in result.rows]
+            if fetch != block_cache.blocks.maxlen or block_cache.fill(recent_blocks, generation):
+                return recent_blocks[:limit]
+            # A block was committed while reading and may be missing from this
+            # snapshot; read again so a stale tip is neither cached nor returned.
+    except Exception as e:
+        print(f"[ERROR] Failed to retrieve recent blocks: {e}")
+        return []
+
+async def get_block(block_index):
+    """Retrieve one block by index, or None if there is no such block."""
+    result = await client.execute("SELECT * FROM blockchain WHERE block_index = ?", (block_index,))
+    return row_to_block(result.rows[0]) if result.rows else None
+
+async def _proof_block(block_index):
+    """The block at `block_index`, reusing a cached copy whose Merkle levels are already built."""
+    block = block_cache.get(block_index)
+    if block is not None:
+        return block
+    with proof_blocks_lock:
+        block = proof_blocks.get(block_index)
+        if block is not None:
+            proof_blocks.move_to_end(block_index)
+            return block
+    block = await get_block(block_index)
+    if block is not None:
+        with proof_blocks_lock:
+            proof_blocks[block_index] = block
+            while len(proof_blocks) > PROOF_CACHE_SIZE:
+                proof_blocks.popitem(last=False)
+    return block
+
+async def get_transaction_proof(tx_id):
+    """Merkle inclusion proof of a committed transaction, or None if it is not in a block.
+
+    Returns the transaction, its block's index, hash and canonical header,
+    and the sibling path from the transaction to the header's merkle_root.
+    """
+    result = await client.execute(
+        "SELECT block_index, position FROM transactions WHERE tx_id = ? AND block_index IS NOT NULL", (tx_id,)
+    )
+    if not result.rows:
+        return None
+    block_index, position = result.rows[0]
+    block = await _proof_block(block_index)
+    if block is None:
+        return None
+    return {
+        "tx": block.data[position],
+        "block_index": block_index,
+        "position": position,
+        "block_hash": block.hash,
+        "header": block.header().decode(),
+        "merkle_root": block.merkle_root,
+        "proof": merkle_proof(block.merkle_levels(), position),
+    }
+
+async def get_accounts(addresses):
+    """Return {address: {"balance", "nonce"}} for the given addresses in one query.
+
+    Errors propagate: a failed read must not look like an empty account.
+    """
+    addresses = list(set(addresses))
+    accounts = {address: {"balance": 0, "nonce": 0} for address in addresses}
+    if not addresses:
+        return accounts
+    placeholders = ",".join("?" * len(addresses))
+    result = await client.execute(
+        f"SELECT address, balance, nonce FROM accounts WHERE address IN ({placeholders})",
+        addresses
+    )
+    for address, balance, nonce in result.rows:
+        accounts[address] = {"balance": balance, "nonce": nonce}
+    return accounts
+
+async def get_account(address):
+    """Return the balance and nonce of one address."""
+    return (await get_accounts([address]))[address]
+
+async def spent_transactions(tx_ids):
+    """Return the subset of `tx_ids` that are already spent.
+
+    Ids the spent filter has never seen are skipped; only possible hits are
+    confirmed, with one IN (...) query per SPENT_QUERY_CHUNK of them.
+    """
+    candidates = list({tx_id for tx_id in tx_ids if tx_id in spent_filter})
+    spent = set()
+    for i in range(0, len(candidates), SPENT_QUERY_CHUNK):
+        chunk = candidates[i:i + SPENT_QUERY_CHUNK]
+        placeholders = ",".join("?" * len(chunk))
+        result = await client.execute(
+            f"SELECT tx_id FROM transactions WHERE tx_id IN ({placeholders})", chunk
+        )
+        spent.update(row[0] for row in result.rows)
+    return spent
+
+async def is_transaction_spent(tx_id):
+    """Check if a transaction has already been spent (UTXO tracking)."""
+    try:
+        return tx_id in await spent_transactions([tx_id])
+    except Exception as e:
+        print(f"[ERROR] Failed to check transaction: {e}")
+        return False
+
+async def mark_transaction_as_spent(tx_id):
+    """Mark a transaction as spent."""
+    try:
+        spent_filter.add(tx_id)
+        await write_queue.submit([("INSERT OR IGNORE INTO transactions (tx_id) VALUES (?)", (tx_id,))])
+    except Exception as e:
+        print(f"[ERROR] Failed to mark transaction as spent: {e}")
+
+async def get_address_transactions(address, after=(0, -1), limit=ADDRESS_PAGE_SIZE):
+    """Return up to `limit` committed transactions sent or received by `address`.
+
+    Transactions come in chain order, starting after the (block_index,
+    position) cursor `after`. Each side is read through its own index, so a
+    page costs O(log n) however long the address history is.
+    """
+    columns = "tx_id, block_index, position, sender, receiver, amount, fee"
+    side = f"""
+        SELECT * FROM (
+            SELECT {columns} FROM transactions
+            WHERE {{column}} = ? AND (block_index, position) > (?, ?)
+            ORDER BY block_index, position LIMIT ?
+        )
+    """
+    result = await client.execute(
+        f"""
+            {side.format(column="sender")} UNION {side.format(column="receiver")}
+            ORDER BY block_index, position LIMIT ?
+        """,
+        (address, *after, limit, address, *after, limit, limit)
+    )
+    return [dict(zip(columns.split(", "), row)) for row in result.rows]
+
+async def get_chain_stats(recent=RECENT_TX_LIMIT):
+    """Return the running chain totals and the latest `recent` transactions.
+
+    Both are index lookups, so the cost does not grow with the chain.
+    """
+    totals = await client.execute(
+        "SELECT blocks, transactions, total_amount, total_fees FROM chain_stats WHERE id = 1"
+    )
+    blocks, transactions, total_amount, total_fees = totals.rows[0] if totals.rows else (0, 0, 0.0, 0.0)
+    columns = "tx_id, block_index, position, sender, receiver, amount, fee"
+    latest = await client.execute(
+        f"""
+            SELECT {columns} FROM transactions WHERE block_index IS NOT NULL
+            ORDER BY block_index DESC, position DESC LIMIT ?
+        """,
+        (recent,)
+    )
+    return {
+        "total_blocks": blocks,
+        "total_transactions": transactions,
+        "total_amount_sent": total_amount,
+        "total_fees_collected": total_fees,
+        "last_transactions": [dict(zip(columns.split(", "), row)) for row in reversed(latest.rows)],
+    }
+
+async def close_db():
+    """Close the database connection."""
+    await write_queue.stop()
+    if client:
+        await client.close()
+        print("[Database] Connection closed.")
\ No newline at end of file
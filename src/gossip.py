@@ -0,0 +1,84 @@
+import asyncio
+import random
+import time
+from collections import deque
+from peers import peer_client
+
+# Peers a node forwards each new block or transaction to.
+GOSSIP_FANOUT = 3
+
+# Message ids (block hashes, tx ids) remembered so repeats are dropped.
+SEEN_MESSAGE_LIMIT = 100_000
+
+# Most recent block propagation delays kept for the latency figures.
+LATENCY_SAMPLES = 1000
+
+
+class Gossip:
+    """Fanout relay of blocks and transactions with duplicate suppression.
+
+    A node forwards an item to GOSSIP_FANOUT random peers the first time it
+    keeps it, instead of the producer sending it to every node in turn.
+    Ids are remembered in a bounded, insertion-ordered seen set, and repeats
+    are answered before any validation. Ids are only marked seen once the
+    item is kept, so one that was dropped can still arrive again by relay.
+    """
+
+    def __init__(self, fanout=GOSSIP_FANOUT, limit=SEEN_MESSAGE_LIMIT):
+        self.fanout = fanout
+        self.limit = limit
+        self.seen = {}  # (kind, id) -> None, oldest first
+        self.delays = deque(maxlen=LATENCY_SAMPLES)
+        self.relayed = 0
+        self.failed = 0
+        self._tasks = set()
+
+    def has_seen(self, kind, key):
+        return key is not None and (kind, key) in self.seen
+
+    def mark_seen(self, kind, key):
+        """Record a message id; False if it was already seen."""
+        if key is None or (kind, key) in self.seen:
+            return False
+        self.seen[(kind, key)] = None
+        if len(self.seen) > self.limit:
+            del self.seen[next(iter(self.seen))]
+        return True
+
+    def record_delay(self, timestamp):
+        """Note how long a block took to arrive since its producer built it."""
+        if isinstance(timestamp, (int, float)) and not isinstance(timestamp, bool):
+            self.delays.append(time.time() - timestamp)
+
+    def relay(self, peers, path, payload):
+        """POST `payload` to a random fanout of `peers` in the background."""
+        peers = list(peers)
+        targets = random.sample(peers, min(self.fanout, len(peers)))
+        if not targets:
+            return
+        task = asyncio.create_task(self._send(targets, path, payload))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, targets, path, payload):
+        failed = await peer_client.broadcast(targets, path, payload)
+        self.relayed += len(targets) - len(failed)
+        self.failed += len(failed)
+        if failed:
+            print(f"[WARNING] Gossip to {path} failed for {failed}")
+
+    def latency(self):
+        """Block propagation delays, in ms, over the last LATENCY_SAMPLES blocks."""
+        if not self.delays:
+            return {"samples": 0}
+        delays = sorted(self.delays)
+        return {
+            "samples": len(delays),
+            "mean_ms": round(sum(delays) / len(delays) * 1000, 2),
+            "p50_ms": round(delays[len(delays) // 2] * 1000, 2),
+            "p99_ms": round(delays[min(len(delays) - 1, len(delays) * 99 // 100)] * 1000, 2),
+            "max_ms": round(delays[-1] * 1000, 2),
+        }
+
+
+gossip = Gossip()
@@ -0,0 +1,222 @@
+import asyncio
+from block import Block
+from blockchain import check_transaction_format, get_latest_block
+from consensus import poa_from_hashes, poa_window
+from transaction import signature_verifier
+import database
+
+# Blocks buffered ahead of the tip while they wait for their parents; a block
+# further ahead than this is refused rather than buffered.
+FUTURE_BLOCK_LIMIT = 64
+
+BLOCK_FIELDS = ("block_index", "previous_hash", "timestamp", "data", "proposer", "proof_of_accuracy", "hash")
+
+# Outcomes of BlockIngest.receive
+APPLIED = "applied"
+KNOWN = "known"
+BUFFERED = "buffered"
+REJECTED = "rejected"
+
+
+class Rejected(Exception):
+    """A block failed an ingest stage; `stage` names the check."""
+
+    def __init__(self, stage, message):
+        super().__init__(message)
+        self.stage = stage
+
+
+def parse_block(block_data):
+    """Structure and hash stages: build a Block from a peer's dict, or raise Rejected."""
+    if not isinstance(block_data, dict) or not all(k in block_data for k in BLOCK_FIELDS):
+        raise Rejected("structure", "Block is missing fields")
+    index, timestamp, data = block_data["block_index"], block_data["timestamp"], block_data["data"]
+    if not isinstance(index, int) or isinstance(index, bool) or index < 1:
+        raise Rejected("structure", "Invalid block index")
+    if not isinstance(timestamp, (int, float)) or isinstance(timestamp, bool):
+        raise Rejected("structure", "Invalid timestamp")
+    if not all(isinstance(block_data[k], str) for k in ("previous_hash", "proposer", "hash")):
+        raise Rejected("structure", "Invalid block field types")
+    if not isinstance(data, list):
+        raise Rejected("structure", "Invalid transaction list")
+    # Genesis credits are unsigned and only checked against the hash; no
+    # other block may be empty or carry them
+    if index > 1 and not data:
+        raise Rejected("structure", "Block has no transactions")
+    for tx in data if index > 1 else ():
+        reason = check_transaction_format(tx)
+        if reason is not None:
+            raise Rejected("structure", f"{reason}: {tx}")
+
+    block = Block(index, block_data["previous_hash"], timestamp, data,
+                  block_data["proposer"], block_data["proof_of_accuracy"])
+    if block.hash != block_data["hash"]:
+        raise Rejected("hash", f"Hash mismatch for block {index}")
+    return block
+
+
+class BlockIngest:
+    """Staged pipeline for blocks received from peers.
+
+    Each block passes the cheap checks first (structure, hash) and is then
+    placed: stale blocks are dropped, blocks ahead of the tip wait in a
+    bounded future-block buffer, and a block at the tip is joined with any
+    buffered successors into a contiguous run. The run goes through the
+    linkage, PoA, double-spend (one spent-id lookup for the run), nonce and
+    balance (one account read for the run) and signature (one batch for the
+    run) stages, and its longest valid prefix is committed as one batch.
+    """
+
+    def __init__(self, limit=FUTURE_BLOCK_LIMIT):
+        self.limit = limit
+        self.future = {}  # block_index -> Block
+        self._lock = asyncio.Lock()
+        self.applied = 0
+        self.rejected = {}  # stage -> count
+
+    def _reject(self, error):
+        self.rejected[error.stage] = self.rejected.get(error.stage, 0) + 1
+        print(f"[ERROR] Block rejected at {error.stage} stage: {error}")
+
+    async def receive(self, block_data):
+        """Ingest one block; returns (outcome, detail) with detail the error or the applied indexes."""
+        try:
+            block = parse_block(block_data)
+        except Rejected as e:
+            self._reject(e)
+            return REJECTED, {"stage": e.stage, "error": str(e)}
+
+        async with self._lock:
+            tip = await get_latest_block()
+            if block.block_index <= tip.block_index:
+                stored = tip if block.block_index == tip.block_index else await database.get_block(block.block_index)
+                if stored.hash == block.hash:
+                    return KNOWN, {"tip": tip.block_index}
+                self._reject(Rejected("position", f"Block {block.block_index} conflicts with the committed one"))
+                return REJECTED, {"stage": "position", "error": "Conflicts with a committed block"}
+            if block.block_index > tip.block_index + 1:
+                if block.block_index - tip.block_index > self.limit:
+                    self._reject(Rejected("position", f"Block {block.block_index} is too far ahead of tip {tip.block_index}"))
+                    return REJECTED, {"stage": "position", "error": "Block is too far ahead of the tip"}
+                if block.block_index not in self.future and len(self.future) >= self.limit:
+                    return REJECTED, {"stage": "position", "error": "Future block buffer is full"}
+                self.future[block.block_index] = block
+                return BUFFERED, {"tip": tip.block_index}
+
+            run = [block]
+            while run[-1].block_index + 1 in self.future:
+                run.append(self.future.pop(run[-1].block_index + 1))
+            try:
+                return APPLIED, {"applied": await self._commit(tip, run)}
+            except Rejected as e:
+                self._reject(e)
+                return REJECTED, {"stage": e.stage, "error": str(e)}
+            finally:
+                self.future = {i: b for i, b in self.future.items() if i > run[-1].block_index}
+
+    async def apply(self, run):
+        """Validate and commit consecutive blocks fetched in bulk, as by chain sync.
+
+        Returns the committed indexes, the longest valid prefix of `run`;
+        raises Rejected if none of it could be committed.
+        """
+        async with self._lock:
+            tip = await get_latest_block()
+            try:
+                if run[0].block_index != tip.block_index + 1:
+                    raise Rejected("position", f"Block {run[0].block_index} does not follow tip {tip.block_index}")
+                applied = await self._commit(tip, run)
+            except Rejected as e:
+                self._reject(e)
+                raise
+            self.future = {i: b for i, b in self.future.items() if i > applied[-1]}
+            return applied
+
+    async def _commit(self, tip, run):
+        valid = await self.validate_run(tip, run)
+        if not await database.insert_blocks(valid):
+            raise Rejected("commit", "Blocks could not be committed")
+        self.applied += len(valid)
+        return [b.block_index for b in valid]
+
+    async def validate_run(self, tip, run):
+        """Linkage, PoA, double-spend, nonce, balance and signature stages over a run starting right after `tip`.
+
+        Returns the longest valid prefix; raises Rejected if even the first
+        block fails. Blocks after a failing one build on it and are dropped.
+        """
+        await poa_window.expected()  # loads the window if needed
+        hashes = poa_window.hashes
+        previous = tip.hash
+        valid = []
+        for position, block in enumerate(run):
+            if block.previous_hash != previous:
+                valid = self._truncate(run, position, Rejected(
+                    "linkage", f"Block {block.block_index} does not extend {previous[:10]}"))
+                break
+            if block.proof_of_accuracy != poa_from_hashes(hashes):
+                valid = self._truncate(run, position, Rejected(
+                    "poa", f"Invalid Proof of Accuracy for block {block.block_index}"))
+                break
+            valid.append(block)
+            previous = block.hash
+            hashes = (hashes + [block.hash])[-poa_window.blocks.maxlen:]
+        return await self._check_transactions(valid)
+
+    async def _check_transactions(self, run):
+        """Double-spend stage, one spent-id lookup for the run, then accounts, then signatures in one batch."""
+        spent = await database.spent_transactions([tx["tx_id"] for block in run for tx in block.data])
+        seen = set()
+        for position, block in enumerate(run):
+            tx_ids = [tx["tx_id"] for tx in block.data]
+            if spent.intersection(tx_ids) or seen.intersection(tx_ids) or len(set(tx_ids)) != len(tx_ids):
+                run = self._truncate(run, position, Rejected(
+                    "double-spend", f"Block {block.block_index} spends a transaction twice"))
+                break
+            seen.update(tx_ids)
+
+        run = await self._check_accounts(run)
+        verified = iter(await signature_verifier.verify([tx for block in run for tx in block.data]))
+        for position, block in enumerate(run):
+            if not all([next(verified) for _ in block.data]):
+                return self._truncate(run, position, Rejected(
+                    "signature", f"Block {block.block_index} has invalid transaction signatures"))
+        return run
+
+    async def _check_accounts(self, run):
+        """Nonce and balance stages: replay the run's transfers over the senders' committed accounts.
+
+        Each sender's nonces must follow on from its account and every
+        debit must be covered, as the accounts table's overdraft trigger
+        would otherwise abort the whole batch at commit.
+        """
+        accounts = await database.get_accounts({tx["sender"] for block in run for tx in block.data})
+        for position, block in enumerate(run):
+            touched = {}  # this block's changes, kept only if the whole block is valid
+            for tx in block.data:
+                sender = touched.setdefault(tx["sender"], dict(accounts[tx["sender"]]))
+                if tx["nonce"] != sender["nonce"]:
+                    return self._truncate(run, position, Rejected(
+                        "nonce", f"Block {block.block_index} has nonce {tx['nonce']} for {tx['sender'][:10]}, "
+                                 f"expected {sender['nonce']}"))
+                if tx["amount"] + tx["fee"] > sender["balance"]:
+                    return self._truncate(run, position, Rejected(
+                        "balance", f"Block {block.block_index} overdraws {tx['sender'][:10]}"))
+                sender["balance"] -= tx["amount"] + tx["fee"]
+                sender["nonce"] += 1
+                # Only senders' balances matter to the checks; other credits are skipped
+                for address, amount in ((tx["receiver"], tx["amount"]), (block.proposer, tx["fee"])):
+                    if address in accounts:
+                        touched.setdefault(address, dict(accounts[address]))["balance"] += amount
+            accounts.update(touched)
+        return run
+
+    def _truncate(self, run, position, error):
+        """The blocks before a failing one; raises if the first block fails."""
+        if position == 0:
+            raise error
+        self._reject(error)
+        return run[:position]
+
+
+block_ingest = BlockIngest()
@@ -0,0 +1,108 @@
+import asyncio
+import heapq
+import itertools
+import time
+
+MEMPOOL_MAX_SIZE = 10_000  # lowest-fee transactions are evicted past this
+MEMPOOL_TX_TTL = 600.0     # seconds a transaction may wait before it is dropped
+BLOCK_MAX_TXS = 500        # cut a block as soon as this many transactions are waiting...
+BLOCK_INTERVAL = 2.0       # ...or after this many seconds, whichever comes first
+
+# Outcomes of Mempool.add
+ADDED = "added"
+DUPLICATE = "duplicate"
+OUTBID = "outbid"
+
+
+class Mempool:
+    """Pending transactions by tx_id, taken highest fee first and evicted lowest fee first.
+
+    Only used from the node's event loop, so it needs no locking.
+    """
+
+    def __init__(self, max_size=MEMPOOL_MAX_SIZE, ttl=MEMPOOL_TX_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.txs = {}  # tx_id -> (tx, time added)
+        # Both heaps hold (priority, arrival, tx_id); entries whose id left
+        # self.txs are skipped lazily.
+        self.by_fee_desc = []
+        self.by_fee_asc = []
+        self.arrivals = itertools.count()
+        self.changed = asyncio.Event()
+        self.evicted = 0
+        self.expired = 0
+
+    def __len__(self):
+        return len(self.txs)
+
+    def __contains__(self, tx_id):
+        return tx_id in self.txs
+
+    def add(self, tx, since=None):
+        """Queue a screened transaction; returns ADDED, DUPLICATE or OUTBID.
+
+        `since` is when the transaction first arrived, for one put back after
+        a take(); its time to live counts from then.
+        """
+        tx_id = tx["tx_id"]
+        if tx_id in self.txs:
+            return DUPLICATE
+        if len(self.txs) >= self.max_size:
+            lowest = self._peek(self.by_fee_asc)
+            if self.txs[lowest][0]["fee"] >= tx["fee"]:
+                return OUTBID
+            del self.txs[lowest]
+            self.evicted += 1
+        arrival = next(self.arrivals)
+        self.txs[tx_id] = (tx, time.monotonic() if since is None else since)
+        heapq.heappush(self.by_fee_desc, (-tx["fee"], arrival, tx_id))
+        heapq.heappush(self.by_fee_asc, (tx["fee"], -arrival, tx_id))
+        self._compact()
+        self.changed.set()
+        return ADDED
+
+    def discard(self, tx_ids):
+        """Forget transactions that were committed some other way."""
+        for tx_id in tx_ids:
+            self.txs.pop(tx_id, None)
+
+    async def take(self, max_txs, timeout):
+        """Wait until max_txs are pending or timeout passes, then remove up to max_txs by fee.
+
+        Returns (tx, since) pairs; expired transactions are dropped instead.
+        """
+        deadline = time.monotonic() + timeout
+        while len(self.txs) < max_txs:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self.changed.clear()
+            try:
+                await asyncio.wait_for(self.changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+        expires = time.monotonic() - self.ttl
+        batch = []
+        while self.txs and len(batch) < max_txs:
+            tx_id = self._peek(self.by_fee_desc)
+            heapq.heappop(self.by_fee_desc)
+            tx, since = self.txs.pop(tx_id)
+            if since < expires:
+                self.expired += 1
+            else:
+                batch.append((tx, since))
+        return batch
+
+    def _peek(self, heap):
+        # Drop stale entries until the head is a live transaction; callers ensure one exists.
+        while heap[0][2] not in self.txs:
+            heapq.heappop(heap)
+        return heap[0][2]
+
+    def _compact(self):
+        if len(self.by_fee_desc) + len(self.by_fee_asc) > 4 * max(len(self.txs), 1):
+            self.by_fee_desc = [e for e in self.by_fee_desc if e[2] in self.txs]
+            self.by_fee_asc = [e for e in self.by_fee_asc if e[2] in self.txs]
+            heapq.heapify(self.by_fee_desc)
+            heapq.heapify(self.by_fee_asc)
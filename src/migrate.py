@@ -0,0 +1,90 @@
+"""Rewrite the stored blocks of a node database in the current encoding.
+
+Usage: python migrate.py [--db PATH] [--compression zlib|lzma|none] [--dry-run]
+
+Rows written by older nodes as JSON text are converted to the binary block
+encoding, and binary rows are recompressed with the chosen codec, one page
+of blocks per transaction. The node must be stopped while this runs. A
+report of the stored size and of block read latency before and after is
+printed at the end.
+"""
+import argparse
+import asyncio
+import os
+import time
+from block import encode_block
+import database
+
+
+async def stored_bytes():
+    result = await database.client.execute("SELECT COALESCE(SUM(LENGTH(CAST(data AS BLOB))), 0) FROM blockchain")
+    return result.rows[0][0]
+
+
+async def read_latency():
+    """Average seconds per block to stream the chain, headers only and fully decoded."""
+    timings = []
+    for decode_data in (False, True):
+        count = 0
+        start = time.perf_counter()
+        async for block in database.iter_blocks():
+            if decode_data:
+                block.data
+            count += 1
+        timings.append((time.perf_counter() - start) / max(count, 1))
+    return timings
+
+
+async def migrate(compression, dry_run):
+    """Re-encode every block; returns (blocks rewritten, encoded bytes)."""
+    rewritten = 0
+    encoded_bytes = 0
+    after = 0
+    while True:
+        page = await database.get_blocks_page(after)
+        if not page:
+            return rewritten, encoded_bytes
+        statements = []
+        for block in page:
+            encoded = encode_block(block, compression, database.BLOCK_COMPRESS_MIN_BYTES)
+            encoded_bytes += len(encoded)
+            statements.append(("UPDATE blockchain SET data = ? WHERE block_index = ?", (encoded, block.block_index)))
+        if not dry_run:
+            await database.client.batch(statements)
+        rewritten += len(page)
+        after = page[-1].block_index
+
+
+async def main(args):
+    database.DB_PATH = args.db
+    compression = None if args.compression == "none" else args.compression
+    await database.init_db()
+    try:
+        file_before = os.path.getsize(args.db)
+        bytes_before = await stored_bytes()
+        header_before, full_before = await read_latency()
+        rewritten, bytes_after = await migrate(compression, args.dry_run)
+        if args.dry_run:
+            print(f"[INFO] Dry run: {rewritten} blocks would be rewritten with compression={args.compression}.")
+            print(f"  block data: {bytes_before} B -> {bytes_after} B "
+                  f"(ratio {bytes_before / max(bytes_after, 1):.2f})")
+            return
+        await database.client.execute("VACUUM")
+        file_after = os.path.getsize(args.db)
+        header_after, full_after = await read_latency()
+    finally:
+        await database.close_db()
+
+    print(f"[INFO] Rewrote {rewritten} blocks with compression={args.compression}.")
+    print(f"  block data: {bytes_before} B -> {bytes_after} B (ratio {bytes_before / max(bytes_after, 1):.2f})")
+    print(f"  database file: {file_before} B -> {file_after} B")
+    print(f"  read, headers only: {header_before * 1e6:.1f} -> {header_after * 1e6:.1f} us/block")
+    print(f"  read, with transactions: {full_before * 1e6:.1f} -> {full_after * 1e6:.1f} us/block")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=database.DB_PATH)
+    parser.add_argument("--compression", choices=["zlib", "lzma", "none"], default=database.BLOCK_COMPRESSION or "none")
+    parser.add_argument("--dry-run", action="store_true", help="report the projected size without writing")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,629 @@
+import asyncio
+import json
+import sys
+import time
+from aiohttp import web
+from blockchain import (NONCE_AHEAD, init_blockchain, get_latest_block, approve_and_add_block, get_blockchain_stats,
+                        check_transaction_format, screen_transactions)
+from admission import admission, admit_writes, heartbeat_admission, peer_admission, refusal
+from block import Block
+from consensus import poa_window, validate_block_poa, verify_poa_proof
+from ingest import APPLIED, BUFFERED, KNOWN, REJECTED, block_ingest
+from mempool import ADDED, BLOCK_INTERVAL, BLOCK_MAX_TXS, DUPLICATE, OUTBID, Mempool
+from transaction import address_of, load_signing_key, signature_verifier
+from gossip import gossip
+from peers import HEARTBEAT_INTERVAL, peer_client, peer_registry
+from response_cache import etag_matches, not_modified, response_cache
+from sync import SYNC_INTERVAL, SYNC_MAX_HEADERS, chain_sync
+import database
+
+routes = web.RouteTableDef()
+nodes = peer_registry
+self_url = None  # this node's own entry in `nodes`, set at startup
+mempool = Mempool()
+
+def forget_committed(block):
+    # Blocks committed by /propose_block or from peers may hold pending transactions
+    if len(mempool):
+        mempool.discard(tx["tx_id"] for tx in block.data if isinstance(tx, dict) and "tx_id" in tx)
+
+database.commit_listeners.append(forget_committed)
+database.commit_listeners.append(response_cache.invalidate)
+
+# Hex seed of the operator's Ed25519 key, whose address the genesis block funds.
+NODE_OPERATOR_KEY_FILE = "operator.key"
+GENESIS_BALANCE = 1_000_000
+
+# Largest page an address-history request may ask for.
+MAX_ADDRESS_PAGE = 1000
+
+# Chains up to this many blocks are served from one cached body by GET
+# /blockchain; longer ones are streamed, still with a tip-keyed ETag.
+BLOCKCHAIN_CACHE_MAX_BLOCKS = 2000
+
+# Seconds a serialized /nodes body is reused; peer latencies change constantly.
+NODES_CACHE_TTL = 1.0
+
+# Most transactions, and bytes, one bulk submission may carry.
+MAX_BULK_TXS = 10_000
+MAX_BULK_BYTES = 16 * 1024 * 1024
+
+async def read_json(request):
+    """The request's JSON body, or None if it is missing or malformed."""
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+@routes.get('/nodes')
+async def get_nodes(request):
+    """Returns the known nodes with their latency, consecutive failures, last contact and health."""
+    async def build():
+        return json.dumps(nodes.snapshot()).encode()
+    return await response_cache.respond(request, "nodes", int(time.monotonic() // NODES_CACHE_TTL), build)
+
+@routes.post('/heartbeat')
+async def heartbeat(request):
+    """Liveness ping from another node, which is registered if it is new.
+
+    A registered node takes no part in votes or gossip until this node's
+    own heartbeat to it succeeds.
+    """
+    refused = heartbeat_admission.take(request.remote)
+    if refused:
+        return refusal(*refused)
+    data = await read_json(request)
+    sender = data.get("from") if isinstance(data, dict) else None
+    if isinstance(sender, str) and sender.startswith(("http://", "https://")) and nodes.add(sender, request.remote):
+        print(f"[INFO] Registered node {sender}")
+    tip = await get_latest_block()
+    return web.json_response({"status": "alive", "tip": tip.block_index if tip else None}, status=200)
+
+def other_nodes(exclude=None):
+    """Healthy nodes other than this one and `exclude`, the peer a message came from, fastest first."""
+    return nodes.healthy(exclude=(self_url, exclude))
+
+@routes.get('/db_stats')
+async def get_db_stats(request):
+    """Returns write-queue and commit timing statistics."""
+    queue = database.write_queue
+    return web.json_response({
+        "write_queue_depth": queue.depth,
+        "last_batch_size": queue.last_batch_size,
+        "batches": queue.batches,
+        "writes": queue.writes,
+        "commits": database.commit_stats,
+        "block_cache": {"hits": database.block_cache.hits, "misses": database.block_cache.misses},
+        "spent_filter": {
+            "ids": database.spent_filter.count,
+            "capacity": database.spent_filter.capacity,
+            "possible_hits": database.spent_filter.hits,
+            "misses": database.spent_filter.misses,
+        },
+        "response_cache": {
+            "entries": len(response_cache.entries),
+            "hits": response_cache.hits,
+            "misses": response_cache.misses,
+            "not_modified": response_cache.not_modified,
+        },
+        "signature_cache": {
+            "size": len(signature_verifier.verified),
+            "hits": signature_verifier.hits,
+            "misses": signature_verifier.misses,
+        },
+    }, status=200)
+
+@routes.get('/stats')
+async def get_stats(request):
+    """Returns chain totals and the latest transactions from the running statistics."""
+    try:
+        return web.json_response(await get_blockchain_stats(), status=200)
+    except Exception as e:
+        print(f"[ERROR] Failed to fetch chain statistics: {e}")
+        return web.json_response({"error": "Internal server error, could not fetch statistics."}, status=500)
+
+@routes.get('/blockchain')
+async def get_blockchain(request):
+    """Returns the blockchain up to the current tip as a JSON array.
+
+    The ETag is keyed on the tip hash, so a client polling an unchanged
+    chain gets 304. Short chains are served from a cached body; longer
+    ones are streamed.
+    """
+    tip = await get_latest_block()
+    if tip is None:
+        return web.json_response({"message": "No blocks found in the blockchain."}, status=404)
+    etag = f'"blockchain-{tip.hash}"'
+
+    async def build():
+        try:
+            blocks = [block.to_dict() async for block in database.iter_blocks(0, tip.block_index)]
+        except Exception as e:
+            print(f"[ERROR] Failed to fetch blockchain: {e}")
+            return web.json_response({"error": "Internal server error, could not fetch blockchain."}, status=500)
+        return json.dumps(blocks).encode()
+
+    if tip.block_index <= BLOCKCHAIN_CACHE_MAX_BLOCKS:
+        return await response_cache.respond(request, "blockchain", tip.hash, build, etag)
+    if etag_matches(request, etag):
+        response_cache.not_modified += 1
+        return not_modified(etag)
+
+    response = web.StreamResponse(headers={"Content-Type": "application/json", "ETag": etag})
+    await response.prepare(request)
+    await response.write(b"[")
+    await stream_blocks(response, 0, tip.block_index,
+                        lambda i, block: ("," if i else "") + json.dumps(block.to_dict()))
+    await response.write(b"]")
+    await response.write_eof()
+    return response
+
+@routes.get('/blocks')
+async def get_blocks(request):
+    """Streams blocks from index `from` onwards as NDJSON, at most `limit` of them."""
+    try:
+        start = int(request.query.get("from", 0))
+        limit = request.query.get("limit")
+        limit = int(limit) if limit is not None else None
+    except ValueError:
+        return web.json_response({"error": "'from' and 'limit' must be integers"}, status=400)
+    if limit is not None and limit < 0:
+        return web.json_response({"error": "'limit' must not be negative"}, status=400)
+
+    response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+    await response.prepare(request)
+    await stream_blocks(response, start - 1, limit, lambda i, block: json.dumps(block.to_dict()) + "\n")
+    await response.write_eof()
+    return response
+
+@routes.get('/headers')
+async def get_headers(request):
+    """Returns compact [block_index, previous_hash, hash] headers from index `from`, for headers-first sync."""
+    try:
+        start = int(request.query.get("from", 1))
+        limit = min(int(request.query.get("limit", SYNC_MAX_HEADERS)), SYNC_MAX_HEADERS)
+    except ValueError:
+        return web.json_response({"error": "'from' and 'limit' must be integers"}, status=400)
+    if limit < 1:
+        return web.json_response({"error": "'limit' must be positive"}, status=400)
+    try:
+        headers = await database.get_headers(start - 1, limit)
+    except Exception as e:
+        print(f"[ERROR] Failed to fetch headers: {e}")
+        return web.json_response({"error": "Internal server error, could not fetch headers."}, status=500)
+    return web.json_response(headers, status=200)
+
+async def stream_blocks(response, after_index, limit, render):
+    """Write render(i, block) for each block after `after_index` to a prepared response.
+
+    Read errors propagate, so a failed stream is cut off instead of ending
+    as a valid but truncated response.
+    """
+    i = 0
+    try:
+        async for block in database.iter_blocks(after_index, limit):
+            await response.write(render(i, block).encode())
+            after_index = block.block_index
+            i += 1
+    except Exception as e:
+        print(f"[ERROR] Block stream failed after block {after_index}: {e}")
+        raise
+
+@routes.get('/address/{address}/transactions')
+async def get_address_transactions(request):
+    """Returns a page of an address's committed transactions, oldest first.
+
+    `after` is a "block_index:position" cursor; pass the returned `next` to
+    fetch the following page.
+    """
+    address = request.match_info["address"]
+    try:
+        after = tuple(int(part) for part in request.query.get("after", "0:-1").split(":"))
+        limit = int(request.query.get("limit", database.ADDRESS_PAGE_SIZE))
+    except ValueError:
+        return web.json_response({"error": "'after' must be block_index:position and 'limit' an integer"}, status=400)
+    if len(after) != 2 or not 0 < limit <= MAX_ADDRESS_PAGE:
+        return web.json_response({"error": f"'after' must be block_index:position and 'limit' 1-{MAX_ADDRESS_PAGE}"}, status=400)
+
+    try:
+        transactions = await database.get_address_transactions(address, after, limit)
+    except Exception as e:
+        print(f"[ERROR] Failed to fetch transactions of {address}: {e}")
+        return web.json_response({"error": "Internal server error, could not fetch transactions."}, status=500)
+    last = transactions[-1] if len(transactions) == limit else None
+    return web.json_response({
+        "address": address,
+        "transactions": transactions,
+        "next": f"{last['block_index']}:{last['position']}" if last else None,
+    }, status=200)
+
+@routes.get('/proof/{tx_id}')
+async def get_proof(request):
+    """Returns a Merkle inclusion proof of a committed transaction.
+
+    Check it with block.verify_transaction_proof against a trusted block hash.
+    """
+    tx_id = request.match_info["tx_id"]
+    try:
+        proof = await database.get_transaction_proof(tx_id)
+    except Exception as e:
+        print(f"[ERROR] Failed to build proof for {tx_id}: {e}")
+        return web.json_response({"error": "Internal server error, could not build proof."}, status=500)
+    if proof is None:
+        return web.json_response({"error": f"Transaction {tx_id} is not in a committed block"}, status=404)
+    return web.json_response(proof, status=200)
+
+@routes.post('/propose_block')
+async def propose_block(request):
+    """Propose a new block and submit PoA proof for validation."""
+    data = await read_json(request)
+    if not isinstance(data, dict):
+        return web.json_response({"error": "Request body must be a JSON object"}, status=400)
+    proposer = data.get("proposer")
+    tx_data = data.get("data")
+    poa_proof = data.get("poa_proof")
+
+    if not proposer or not isinstance(tx_data, list) or len(tx_data) == 0:
+        return web.json_response({"error": "Missing or invalid proposer/transaction data"}, status=400)
+
+    if not poa_proof:
+        return web.json_response({"error": "Missing Proof of Accuracy"}, status=400)
+
+    for txn in tx_data:
+        reason = check_transaction_format(txn)
+        if reason is not None:
+            return web.json_response({"error": f"{reason}: {txn}"}, status=400)
+
+    try:
+        accepted, rejected = await screen_transactions(tx_data)
+    except Exception as e:
+        print(f"[ERROR] Failed to check transactions: {e}")
+        return web.json_response({"error": "Internal server error, could not check transactions."}, status=500)
+    if rejected:
+        return web.json_response({"error": "Invalid transactions in proposal", "rejected": rejected}, status=400)
+
+    if not await verify_poa_proof(poa_proof):
+        return web.json_response({"error": "Invalid Proof of Accuracy"}, status=400)
+
+    return await commit_block(proposer, accepted, poa_proof)
+
+async def commit_block(proposer, transactions, poa_proof):
+    """Build the next block from screened transactions, put it to a vote and commit it."""
+    last_block = await get_latest_block()
+    new_block = Block(
+        block_index=last_block.block_index + 1,
+        previous_hash=last_block.hash,
+        timestamp=time.time(),
+        data=transactions,
+        proposer=proposer,
+        proof_of_accuracy=await poa_window.expected()
+    )
+
+    if await collect_votes(new_block, poa_proof):
+        if not await approve_and_add_block(new_block, transactions):
+            return web.json_response({"error": "Block could not be committed"}, status=409)
+        gossip.mark_seen("block", new_block.hash)
+        gossip.relay(other_nodes(), "/receive_block", {"block": new_block.to_dict(), "from": self_url})
+        return web.json_response({"status": "Block added", "block": new_block.to_dict()}, status=200)
+    else:
+        return web.json_response({"error": "Block rejected by network"}, status=400)
+
+async def admit_transactions(txs):
+    """Screen transactions in one pass and queue the admissible ones in the mempool.
+
+    Returns a result per entry, in order: its tx_id and status ("added",
+    "duplicate", "outbid" or "rejected" with an error). An entry of None
+    stands for one that was not valid JSON. Database errors propagate.
+    """
+    results = [None] * len(txs)
+    unique = {}
+    for i, txn in enumerate(txs):
+        reason = "Invalid JSON" if txn is None else check_transaction_format(txn)
+        if reason is not None:
+            tx_id = txn.get("tx_id") if isinstance(txn, dict) else None
+            results[i] = {"index": i, "tx_id": tx_id, "status": "rejected", "error": reason}
+        elif txn["tx_id"] in unique:
+            results[i] = {"index": i, "tx_id": txn["tx_id"], "status": DUPLICATE}
+        else:
+            unique[txn["tx_id"]] = i
+
+    _, rejected = await screen_transactions([txs[i] for i in unique.values()])
+    for tx_id, i in unique.items():
+        # A nonce ahead of the committed one may follow a transaction still in the mempool
+        reason = rejected.get(tx_id)
+        if reason is not None and reason != NONCE_AHEAD:
+            results[i] = {"index": i, "tx_id": tx_id, "status": "rejected", "error": reason}
+        else:
+            results[i] = {"index": i, "tx_id": tx_id, "status": mempool.add(txs[i])}
+    return results
+
+@routes.post('/submit_transaction')
+async def submit_transaction(request):
+    """Queue one transaction in the mempool for the block producer."""
+    txn = await read_json(request)
+    try:
+        result, = await admit_transactions([txn])
+    except Exception as e:
+        print(f"[ERROR] Failed to check transaction: {e}")
+        return web.json_response({"error": "Internal server error, could not check transaction."}, status=500)
+    if result["status"] == "rejected":
+        return web.json_response({"error": result["error"]}, status=400)
+    if result["status"] == OUTBID:
+        return web.json_response({"error": "Mempool full, fee too low"}, status=503)
+    spread_transactions([txn], [result])
+    return web.json_response({"status": result["status"], "tx_id": result["tx_id"]},
+                             status=202 if result["status"] == ADDED else 200)
+
+async def read_body(request, limit):
+    """The request body, or None if it is longer than `limit` bytes."""
+    chunks, size = [], 0
+    async for chunk in request.content.iter_chunked(64 * 1024):
+        size += len(chunk)
+        if size > limit:
+            return None
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+@routes.post('/submit_transactions')
+async def submit_transactions(request):
+    """Queue many transactions at once, sent as a JSON array or as NDJSON.
+
+    Signatures are verified in one batch and spent ids looked up together;
+    the response holds a result per transaction, as from admit_transactions.
+    """
+    body = await read_body(request, MAX_BULK_BYTES)
+    if body is None:
+        return web.json_response({"error": f"Body larger than {MAX_BULK_BYTES} bytes"}, status=413)
+    if request.content_type == "application/x-ndjson":
+        txs = []
+        for line in body.splitlines():
+            if line.strip():
+                try:
+                    txs.append(json.loads(line))
+                except ValueError:
+                    txs.append(None)
+    else:
+        try:
+            txs = json.loads(body)
+        except ValueError:
+            txs = None
+        if not isinstance(txs, list):
+            return web.json_response({"error": "Body must be a JSON array or NDJSON"}, status=400)
+    if len(txs) > MAX_BULK_TXS:
+        return web.json_response({"error": f"At most {MAX_BULK_TXS} transactions per request"}, status=413)
+    # The request itself paid one token; each further transaction costs another
+    refused = admission.take(request.remote, len(txs) - 1) if len(txs) > 1 else None
+    if refused:
+        return refusal(*refused)
+
+    try:
+        results = await admit_transactions(txs)
+    except Exception as e:
+        print(f"[ERROR] Failed to check transactions: {e}")
+        return web.json_response({"error": "Internal server error, could not check transactions."}, status=500)
+    spread_transactions(txs, results)
+    return web.json_response({
+        "added": sum(result["status"] == ADDED for result in results),
+        "results": results,
+    }, status=200)
+
+def spread_transactions(txs, results, origin=None):
+    """Gossip the transactions the mempool just took to a fanout of the other nodes."""
+    added = [txs[result["index"]] for result in results
+             if result["status"] == ADDED and gossip.mark_seen("tx", result["tx_id"])]
+    if added:
+        gossip.relay(other_nodes(origin), "/relay_transactions", {"txs": added, "from": self_url})
+
+@routes.post('/relay_transactions')
+async def relay_transactions(request):
+    """Take transactions gossiped by another node; ones seen before are dropped unchecked."""
+    data = await read_json(request)
+    if not isinstance(data, dict) or not isinstance(data.get("txs"), list):
+        return web.json_response({"error": "Invalid request, 'txs' missing"}, status=400)
+    txs = [tx for tx in data["txs"] if not (isinstance(tx, dict) and gossip.has_seen("tx", tx.get("tx_id")))]
+    refused = peer_admission.take(request.remote, len(txs) - 1) if len(txs) > 1 else None
+    if refused:
+        return refusal(*refused)
+    try:
+        results = await admit_transactions(txs)
+    except Exception as e:
+        print(f"[ERROR] Failed to check relayed transactions: {e}")
+        return web.json_response({"error": "Internal server error, could not check transactions."}, status=500)
+    spread_transactions(txs, results, data.get("from"))
+    return web.json_response({"added": sum(result["status"] == ADDED for result in results)}, status=200)
+
+@routes.get('/mempool')
+async def get_mempool(request):
+    """Returns the number of pending transactions and how many were evicted or expired."""
+    return web.json_response({
+        "pending": len(mempool),
+        "max_size": mempool.max_size,
+        "evicted": mempool.evicted,
+        "expired": mempool.expired,
+    }, status=200)
+
+async def produce_blocks(app):
+    """Cut a block from the mempool whenever BLOCK_MAX_TXS are waiting or BLOCK_INTERVAL passes."""
+    while True:
+        batch = await mempool.take(BLOCK_MAX_TXS, BLOCK_INTERVAL)
+        if not batch:
+            continue
+        since = {tx["tx_id"]: added for tx, added in batch}
+        try:
+            accepted, rejected = await screen_transactions([tx for tx, _ in batch])
+        except Exception as e:
+            print(f"[ERROR] Block producer failed to check transactions: {e}")
+            for tx, added in batch:
+                mempool.add(tx, added)
+            continue
+        # Transactions waiting on an earlier nonce, or on a failed round, go back in
+        requeue = [tx for tx, _ in batch if rejected.get(tx["tx_id"]) == NONCE_AHEAD]
+        if accepted:
+            poa_proof = [{"tx_id": tx["tx_id"], "transaction": tx} for tx in accepted]
+            response = await commit_block(app["operator"], accepted, poa_proof)
+            if response.status != 200:
+                requeue += accepted
+        for tx in requeue:
+            mempool.add(tx, since[tx["tx_id"]])
+
+@routes.get('/balance/{address}')
+async def get_balance(request):
+    """Returns the committed balance and nonce of an address."""
+    address = request.match_info["address"]
+    try:
+        account = await database.get_account(address)
+    except Exception as e:
+        print(f"[ERROR] Failed to read the account of {address}: {e}")
+        return web.json_response({"error": "Could not read the account, try again."}, status=503,
+                                 headers={"Retry-After": "1"})
+    return web.json_response({"address": address, **account}, status=200)
+
+@routes.get('/recent_blocks')
+async def get_recent_blocks(request):
+    """Return the latest block for Proof of Accuracy verification, with an ETag keyed on it."""
+    recent_blocks = await database.get_recent_blocks(1)
+    if not recent_blocks:
+        return web.json_response({"error": "No recent blocks found"}, status=400)
+
+    async def build():
+        return json.dumps([block.to_dict() for block in recent_blocks]).encode()
+    tip = recent_blocks[0]
+    return await response_cache.respond(request, "recent_blocks", tip.hash, build, f'"recent-{tip.hash}"')
+
+@routes.post('/vote')
+async def vote(request):
+    """Vote on a proposed block based on its validity and Proof of Accuracy."""
+    data = await read_json(request)
+    if not isinstance(data, dict):
+        return web.json_response({"error": "Request body must be a JSON object"}, status=400)
+    block_data = data.get("block")
+    poa_proof = data.get("poa_proof")
+
+    if not block_data or not poa_proof:
+        return web.json_response({"error": "No block data or PoA proof provided"}, status=400)
+
+    last_block = await get_latest_block()
+    if last_block is None:
+        return web.json_response({"error": "Failed to retrieve latest block"}, status=500)
+
+    is_valid = (block_data["previous_hash"] == last_block.hash and
+                block_data["block_index"] == last_block.block_index + 1)
+
+    if is_valid and await verify_poa_proof(poa_proof) and await validate_block_poa(block_data):
+        return web.json_response({"vote": True}, status=200)
+    else:
+        return web.json_response({"vote": False}, status=400)
+
+async def collect_votes(block, poa_proof):
+    """Ask nodes to vote concurrently; True once a majority approves."""
+    voters = nodes.healthy()
+    if not voters:
+        print("[INFO] No nodes available. Auto-approving block.")
+        return True
+    return await peer_client.collect_votes(voters, {"block": block.to_dict(), "poa_proof": poa_proof})
+
+@routes.post('/receive_block')
+async def receive_block(request):
+    """Ingest a block from a peer through the staged pipeline in ingest.py."""
+    data = await read_json(request)
+    if not isinstance(data, dict) or "block" not in data:
+        return web.json_response({"error": "Invalid request, 'block' missing"}, status=400)
+    block_data = data["block"]
+    block_hash = block_data.get("hash") if isinstance(block_data, dict) else None
+    if gossip.has_seen("block", block_hash):
+        return web.json_response({"status": KNOWN}, status=200)
+    outcome, detail = await block_ingest.receive(block_data)
+    if outcome in (APPLIED, BUFFERED) and gossip.mark_seen("block", block_hash):
+        gossip.record_delay(block_data.get("timestamp"))
+        gossip.relay(other_nodes(data.get("from")), "/receive_block", {"block": block_data, "from": self_url})
+    elif outcome == KNOWN:
+        gossip.mark_seen("block", block_hash)
+    status = {APPLIED: 200, KNOWN: 200, BUFFERED: 202, REJECTED: 400}[outcome]
+    return web.json_response({"status": outcome, **detail}, status=status)
+
+@routes.post('/broadcast_block')
+async def broadcast_block(request):
+    """API endpoint to start gossiping a block; a fanout of nodes gets it and relays it on."""
+    data = await read_json(request)
+    if not data or 'block' not in data:
+        return web.json_response({"error": "Invalid request, 'block' missing"}, status=400)
+    gossip.relay(other_nodes(), "/receive_block", {"block": data['block'], "from": self_url})
+    return web.json_response({"message": "Block handed to gossip", "fanout": gossip.fanout}, status=202)
+
+@routes.get('/admission')
+async def get_admission(request):
+    """Returns client and peer write requests in flight and how many were admitted, throttled (429) or shed (503)."""
+    return web.json_response({"clients": admission.stats(), "peers": peer_admission.stats()}, status=200)
+
+@routes.get('/gossip')
+async def get_gossip(request):
+    """Returns gossip counters and how long blocks took to reach this node."""
+    return web.json_response({
+        "fanout": gossip.fanout,
+        "seen": len(gossip.seen),
+        "relayed": gossip.relayed,
+        "failed": gossip.failed,
+        "propagation": gossip.latency(),
+    }, status=200)
+
+@routes.post('/sync')
+async def sync_chain(request):
+    """Catch up with the other nodes now; returns how many blocks were committed and how fast."""
+    return web.json_response(await chain_sync.sync(other_nodes()), status=200)
+
+async def sync_periodically(app):
+    """Catch up with the other nodes every SYNC_INTERVAL, in case blocks were missed."""
+    while True:
+        await asyncio.sleep(SYNC_INTERVAL)
+        try:
+            await chain_sync.sync(other_nodes())
+        except Exception as e:
+            print(f"[ERROR] Chain sync failed: {e}")
+
+async def send_heartbeats(app):
+    """Ping every known node each HEARTBEAT_INTERVAL and evict the ones that stopped answering."""
+    while True:
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        # This node pings itself too, so its own vote is timed like the others
+        await peer_client.broadcast(list(nodes), "/heartbeat", {"from": self_url})
+        for url in nodes.evict(keep=(self_url,)):
+            print(f"[INFO] Evicted unresponsive node {url}")
+
+async def start_node(app):
+    await database.init_db()  # Initialize database first
+    app["operator"] = address_of(load_signing_key(NODE_OPERATOR_KEY_FILE))
+    global self_url
+    self_url = f"http://localhost:{app['port']}"
+    nodes.add(self_url)
+    nodes.update(app["peers"])
+    # Reach the configured peers first: only nodes that answered are synced from
+    await peer_client.broadcast(app["peers"], "/heartbeat", {"from": self_url})
+    # A new node takes the genesis and chain of its peers before making its own
+    await chain_sync.sync(other_nodes())
+    await init_blockchain({app["operator"]: GENESIS_BALANCE})  # Ensure blockchain gets initialized correctly
+    app["producer"] = asyncio.create_task(produce_blocks(app))
+    app["syncer"] = asyncio.create_task(sync_periodically(app))
+    app["heartbeat"] = asyncio.create_task(send_heartbeats(app))
+
+async def stop_node(app):
+    app["producer"].cancel()
+    app["syncer"].cancel()
+    app["heartbeat"].cancel()
+    await peer_client.close()
+    await database.close_db()
+
+def create_app(port, peers=()):
+    """The node's API, served from one event loop that the DB client and peer sessions are shared on."""
+    app = web.Application(middlewares=[admit_writes])
+    app["port"] = port
+    app["peers"] = list(peers)
+    app.add_routes(routes)
+    app.on_startup.append(start_node)
+    app.on_cleanup.append(stop_node)
+    return app
+
+if __name__ == '__main__':
+    NODE_PORT = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    PEERS = sys.argv[2:]  # URLs of other nodes, e.g. http://localhost:5001
+    print(f"Starting node on port {NODE_PORT}")
+    web.run_app(create_app(NODE_PORT, PEERS), host="0.0.0.0", port=NODE_PORT)
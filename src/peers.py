@@ -0,0 +1,255 @@
+import asyncio
+import json
+import time
+import aiohttp
+
+# Longest a single peer may take to answer; a slower peer counts as failed.
+PEER_TIMEOUT = 2.0
+
+# Open connections kept to all peers together, and to any one peer.
+POOL_SIZE = 100
+POOL_SIZE_PER_PEER = 10
+
+# Weight of the latest call in a peer's latency average.
+LATENCY_EWMA_ALPHA = 0.3
+
+# Seconds between heartbeats to every known peer.
+HEARTBEAT_INTERVAL = 5.0
+
+# A peer is evicted after this many failed calls in a row, or after this
+# many seconds without a successful one.
+PEER_MAX_FAILURES = 5
+PEER_DEAD_AFTER = 60.0
+
+# Most peers one registry tracks; further announcements are ignored.
+PEER_LIMIT = 256
+
+# Most peers that announcements from one source address may register.
+PEER_LIMIT_PER_SOURCE = 8
+
+
+class Peer:
+    """What the registry knows about one peer."""
+
+    __slots__ = ("url", "source", "latency", "failures", "last_seen", "added")
+
+    def __init__(self, url, source=None):
+        self.url = url
+        self.source = source  # address that announced the peer, None if configured
+        self.latency = None  # EWMA of call durations in seconds, None until one succeeds
+        self.failures = 0  # consecutive
+        self.last_seen = None  # last successful call; None until this node has reached the peer
+        self.added = time.monotonic()
+
+    def to_dict(self, now):
+        return {
+            "url": self.url,
+            "latency_ms": round(self.latency * 1000, 2) if self.latency is not None else None,
+            "failures": self.failures,
+            "last_seen_s": round(now - self.last_seen, 1) if self.last_seen is not None else None,
+        }
+
+
+class PeerRegistry:
+    """Known nodes with their liveness, latency and failure counts.
+
+    Every call through PeerClient updates the peer it went to: a success
+    refreshes last_seen and folds the duration into an EWMA, a failure adds
+    to a run of consecutive failures. healthy() lists the live peers,
+    fastest first, for votes, gossip and sync to draw from. A peer is only
+    live once a call to it has succeeded, so an announced URL gets no vote
+    until it answers. evict() drops peers that keep failing, have gone
+    silent, or were never reached within dead_after of being added.
+    """
+
+    def __init__(self, alpha=LATENCY_EWMA_ALPHA, max_failures=PEER_MAX_FAILURES, dead_after=PEER_DEAD_AFTER,
+                 limit=PEER_LIMIT, limit_per_source=PEER_LIMIT_PER_SOURCE):
+        self.alpha = alpha
+        self.limit = limit
+        self.limit_per_source = limit_per_source
+        self.sources = {}  # announcing address -> peers it registered
+        self.max_failures = max_failures
+        self.dead_after = dead_after
+        self.peers = {}  # url -> Peer
+        self.evicted = 0
+
+    def __contains__(self, url):
+        return url in self.peers
+
+    def __iter__(self):
+        return iter(list(self.peers))
+
+    def __len__(self):
+        return len(self.peers)
+
+    def add(self, url, source=None):
+        """Register a peer announced from `source`; True if it was new and there was room for it."""
+        if url in self.peers or len(self.peers) >= self.limit:
+            return False
+        if source is not None:
+            if self.sources.get(source, 0) >= self.limit_per_source:
+                return False
+            self.sources[source] = self.sources.get(source, 0) + 1
+        self.peers[url] = Peer(url, source)
+        return True
+
+    def update(self, urls):
+        for url in urls:
+            self.add(url)
+
+    def record_success(self, url, seconds):
+        peer = self.peers.get(url)
+        if peer is None:
+            return
+        peer.latency = seconds if peer.latency is None else self.alpha * seconds + (1 - self.alpha) * peer.latency
+        peer.failures = 0
+        peer.last_seen = time.monotonic()
+
+    def record_failure(self, url):
+        peer = self.peers.get(url)
+        if peer is not None:
+            peer.failures += 1
+
+    def is_healthy(self, peer, now):
+        return (peer.last_seen is not None and peer.failures < self.max_failures
+                and now - peer.last_seen < self.dead_after)
+
+    def is_dead(self, peer, now):
+        seen = peer.last_seen if peer.last_seen is not None else peer.added
+        return peer.failures >= self.max_failures or now - seen >= self.dead_after
+
+    def healthy(self, exclude=()):
+        """Live peers, fastest first."""
+        now = time.monotonic()
+        live = [peer for peer in self.peers.values() if peer.url not in exclude and self.is_healthy(peer, now)]
+        live.sort(key=lambda peer: peer.latency)
+        return [peer.url for peer in live]
+
+    def evict(self, keep=()):
+        """Drop dead peers other than `keep`; returns their urls."""
+        now = time.monotonic()
+        dead = [url for url, peer in self.peers.items() if url not in keep and self.is_dead(peer, now)]
+        for url in dead:
+            source = self.peers.pop(url).source
+            if source is not None:
+                self.sources[source] -= 1
+                if not self.sources[source]:
+                    del self.sources[source]
+        self.evicted += len(dead)
+        return dead
+
+    def snapshot(self):
+        now = time.monotonic()
+        return [dict(peer.to_dict(now), healthy=self.is_healthy(peer, now))
+                for peer in sorted(self.peers.values(), key=lambda peer: peer.url)]
+
+
+class PeerClient:
+    """Long-lived HTTP client shared by everything that talks to peers.
+
+    Connections are pooled and kept alive across calls. The session is
+    bound to the event loop that created it, and is replaced when called
+    from a different one.
+    """
+
+    def __init__(self, timeout=PEER_TIMEOUT, registry=None):
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.registry = registry if registry is not None else PeerRegistry()
+        self._session = None
+        self._loop = None
+
+    def session(self):
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            connector = aiohttp.TCPConnector(limit=POOL_SIZE, limit_per_host=POOL_SIZE_PER_PEER)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+            self._loop = loop
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def post(self, peer, path, body):
+        """POST an already-encoded JSON `body`; returns (status, decoded reply or None)."""
+        start = time.perf_counter()
+        try:
+            async with self.session().post(f"{peer}{path}", data=body,
+                                           headers={"Content-Type": "application/json"}) as response:
+                try:
+                    reply = await response.json(content_type=None)
+                except ValueError:
+                    reply = None
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            self.registry.record_failure(peer)
+            raise
+        self.registry.record_success(peer, time.perf_counter() - start)
+        return response.status, reply
+
+    async def get(self, peer, path):
+        """GET `path` from a peer; returns (status, raw body)."""
+        start = time.perf_counter()
+        try:
+            async with self.session().get(f"{peer}{path}") as response:
+                body = await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            self.registry.record_failure(peer)
+            raise
+        self.registry.record_success(peer, time.perf_counter() - start)
+        return response.status, body
+
+    async def _vote(self, peer, body):
+        try:
+            _, reply = await self.post(peer, "/vote", body)
+            return isinstance(reply, dict) and reply.get("vote") is True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"[ERROR] No vote from {peer}: {e!r}")
+            return False
+
+    async def collect_votes(self, peers, payload):
+        """Ask every peer to vote on `payload` at once; True once a majority approves.
+
+        Returns as soon as the outcome is settled either way, so a round
+        takes as long as the median peer rather than the slowest one.
+        A peer that fails or times out votes against.
+        """
+        peers = list(peers)
+        needed = len(peers) // 2 + 1
+        body = json.dumps(payload)
+        pending = {asyncio.ensure_future(self._vote(peer, body)) for peer in peers}
+        approvals = rejections = 0
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.result():
+                        approvals += 1
+                    else:
+                        rejections += 1
+                if approvals >= needed:
+                    return True
+                if rejections > len(peers) - needed:
+                    return False
+            return False
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def broadcast(self, peers, path, payload):
+        """POST `payload` to every peer at once; returns the peers that did not accept it."""
+        peers = list(peers)
+        body = json.dumps(payload)
+
+        async def send(peer):
+            try:
+                status, _ = await self.post(peer, path, body)
+                return 200 <= status < 300
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                return False
+
+        results = await asyncio.gather(*(send(peer) for peer in peers))
+        return [peer for peer, ok in zip(peers, results) if not ok]
+
+
+peer_registry = PeerRegistry()
+peer_client = PeerClient(registry=peer_registry)
@@ -0,0 +1,64 @@
+import hashlib
+from aiohttp import web
+
+
+def etag_matches(request, etag):
+    """Whether the request's If-None-Match names `etag` (weak or strong) or is "*"."""
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+def not_modified(etag):
+    return web.Response(status=304, headers={"ETag": etag})
+
+
+class ResponseCache:
+    """Pre-serialized JSON bodies of hot read endpoints, with ETags.
+
+    Each entry is stored with the version of the state it shows, such as the
+    chain tip hash, and is rebuilt once the version changes; commits also
+    drop every entry through invalidate(). When the ETag is derived from the
+    version, a client that already holds it gets 304 before any body is
+    read or built.
+    """
+
+    def __init__(self):
+        self.entries = {}  # key -> (version, etag, body)
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def invalidate(self, block=None):
+        """Drop every cached body; registered as a database commit listener."""
+        self.entries.clear()
+
+    async def respond(self, request, key, version, build, etag=None):
+        """Serve `key` for state `version`, building the body with `build()` on a miss.
+
+        `build` returns the encoded body, or a response (such as an error)
+        that is sent as is and not cached. Without `etag`, the body's digest
+        is used.
+        """
+        if etag is not None and etag_matches(request, etag):
+            self.not_modified += 1
+            return not_modified(etag)
+        entry = self.entries.get(key)
+        if entry is None or entry[0] != version:
+            self.misses += 1
+            body = await build()
+            if isinstance(body, web.StreamResponse):
+                return body
+            entry = (version, etag or f'"{hashlib.sha256(body).hexdigest()[:32]}"', body)
+            self.entries[key] = entry
+        else:
+            self.hits += 1
+        if etag_matches(request, entry[1]):
+            self.not_modified += 1
+            return not_modified(entry[1])
+        return web.Response(body=entry[2], content_type="application/json", headers={"ETag": entry[1]})
+
+
+response_cache = ResponseCache()
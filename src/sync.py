@@ -0,0 +1,171 @@
+import asyncio
+import json
+import time
+import aiohttp
+from blockchain import get_latest_block
+from ingest import Rejected, block_ingest, parse_block
+from peers import peer_client
+import database
+
+# Most headers a peer returns for one /headers request.
+SYNC_MAX_HEADERS = 2000
+
+# Blocks fetched from one peer per body request; ranges are spread over peers.
+SYNC_RANGE = 100
+
+# Seconds between background sync rounds.
+SYNC_INTERVAL = 10.0
+
+
+def linked_headers(headers, tip_index, tip_hash):
+    """The prefix of a peer's headers that chains onto the tip, as tuples."""
+    linked = []
+    for header in headers if isinstance(headers, list) else []:
+        if not isinstance(header, list) or len(header) != 3:
+            break
+        index, previous_hash, block_hash = header
+        if index != tip_index + 1 or previous_hash != tip_hash or not isinstance(block_hash, str):
+            break
+        linked.append((index, previous_hash, block_hash))
+        tip_index, tip_hash = index, block_hash
+    return linked
+
+
+class ChainSync:
+    """Headers-first catch-up from several peers.
+
+    Every peer is asked for compact headers past the local tip at once, and
+    the longest chain linking to the tip is picked from them. Its bodies are
+    then fetched in SYNC_RANGE-sized ranges, spread over the peers holding
+    each range and downloaded in parallel, checked against the advertised
+    hashes, and committed in order through block_ingest, one batch per range.
+    """
+
+    def __init__(self, max_headers=SYNC_MAX_HEADERS, range_size=SYNC_RANGE):
+        self.max_headers = max_headers
+        self.range_size = range_size
+        self._lock = asyncio.Lock()
+        self.synced = 0
+        self.last_report = None
+
+    async def headers(self, peer, after_index):
+        try:
+            status, body = await peer_client.get(peer, f"/headers?from={after_index + 1}&limit={self.max_headers}")
+            return json.loads(body) if status == 200 else []
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            print(f"[ERROR] No headers from {peer}: {e!r}")
+            return []
+
+    async def fetch_range(self, peer, expected):
+        """Blocks for `expected` headers from one peer, or None if it failed.
+
+        A peer may answer with a prefix of the range; the rest is fetched in
+        the next round.
+        """
+        try:
+            status, body = await peer_client.get(peer, f"/blocks?from={expected[0][0]}&limit={len(expected)}")
+            if status != 200:
+                return None
+            blocks = [parse_block(json.loads(line)) for line in body.splitlines() if line.strip()]
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, Rejected) as e:
+            print(f"[ERROR] Failed to fetch blocks {expected[0][0]}-{expected[-1][0]} from {peer}: {e!r}")
+            return None
+        if not blocks or len(blocks) > len(expected) or any(
+                block.hash != header[2] for block, header in zip(blocks, expected)):
+            print(f"[ERROR] Blocks from {peer} do not match the headers it advertised")
+            return None
+        return blocks
+
+    async def download(self, holders, expected):
+        """Fetch one range, trying each peer that holds it in turn."""
+        for peer in holders:
+            blocks = await self.fetch_range(peer, expected)
+            if blocks:
+                return blocks
+        return None
+
+    async def adopt_genesis(self, peers):
+        """An empty node takes the genesis block most peers agree on."""
+        chains = await asyncio.gather(*(self.headers(peer, 0) for peer in peers))
+        votes = {}
+        for peer, headers in zip(peers, chains):
+            linked = linked_headers(headers, 0, "0")
+            if linked:
+                votes.setdefault(linked[0], []).append(peer)
+        if not votes:
+            return False
+        genesis, holders = max(votes.items(), key=lambda item: len(item[1]))
+        blocks = await self.download(holders, [genesis])
+        if not blocks or not await database.insert_block(blocks[0]):
+            return False
+        print(f"[INFO] Adopted genesis block {genesis[2][:10]} from {len(holders)} of {len(peers)} peers")
+        return True
+
+    async def sync_round(self, peers):
+        """One headers-then-bodies pass; returns the number of blocks committed."""
+        tip = await get_latest_block()
+        if tip is None:
+            return int(await self.adopt_genesis(peers))
+
+        chains = {}
+        for peer, headers in zip(peers, await asyncio.gather(*(self.headers(peer, tip.block_index) for peer in peers))):
+            linked = linked_headers(headers, tip.block_index, tip.hash)
+            if headers and not linked:
+                print(f"[ERROR] Headers from {peer} do not extend block {tip.block_index}; "
+                      f"it is on a fork or another genesis")
+            if linked:
+                chains[peer] = linked
+        if not chains:
+            return 0
+
+        best = max(chains.values(), key=len)
+        ranges = [best[i:i + self.range_size] for i in range(0, len(best), self.range_size)]
+        downloads = []
+        for n, expected in enumerate(ranges):
+            # A peer holds a range if its chain reaches the range's last header
+            position = len(expected) + n * self.range_size - 1
+            holders = [peer for peer, chain in chains.items()
+                       if len(chain) > position and chain[position] == expected[-1]]
+            holders = holders[n % len(holders):] + holders[:n % len(holders)]
+            downloads.append(self.download(holders, expected))
+
+        applied = 0
+        results = await asyncio.gather(*downloads)
+        for expected, blocks in zip(ranges, results):
+            if not blocks:
+                break
+            try:
+                applied += len(await block_ingest.apply(blocks))
+            except Rejected:
+                break
+            if len(blocks) < len(expected):
+                break
+        return applied
+
+    async def sync(self, peers):
+        """Catch up with `peers` until a round commits nothing; returns a report."""
+        peers = list(peers)
+        async with self._lock:
+            start = time.perf_counter()
+            applied = 0
+            while peers:
+                progress = await self.sync_round(peers)
+                if not progress:
+                    break
+                applied += progress
+            elapsed = time.perf_counter() - start
+            tip = await get_latest_block()
+            self.synced += applied
+            self.last_report = {
+                "applied": applied,
+                "seconds": round(elapsed, 3),
+                "blocks_per_second": round(applied / elapsed, 1) if elapsed else None,
+                "tip": tip.block_index if tip else None,
+            }
+            if applied:
+                print(f"[INFO] Synced {applied} blocks in {elapsed:.2f} s "
+                      f"({self.last_report['blocks_per_second']} blocks/s), tip {self.last_report['tip']}")
+            return self.last_report
+
+
+chain_sync = ChainSync()
@@ -0,0 +1,97 @@
+import asyncio
+import time
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+import admission as admission_module
+from admission import Admission, admit_writes
+
+
+def test_buckets_throttle_clients_and_shed_global_overload(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    limits = Admission(client_rate=1, client_burst=2, global_rate=10, global_burst=3)
+
+    assert limits.take("a") is None and limits.take("a") is None
+    status, retry_after = limits.take("a")
+    assert status == 429 and retry_after == 1.0
+    assert limits.take("b") is None
+    # The global bucket is empty: "c" is refused and keeps its own tokens
+    assert limits.take("c")[0] == 503
+    now[0] += 0.1
+    status, retry_after = limits.take("c", 2)
+    assert status == 503 and abs(retry_after - 0.1) < 1e-9
+    assert limits.clients["c"].tokens == 2
+
+    # A batch bigger than a bucket waits for a full bucket instead of failing forever
+    now[0] += 10
+    assert limits.take("a", 50) is None
+    assert limits.clients["a"].tokens == 0
+
+
+def test_writes_past_the_inflight_limit_get_503_with_retry_after(monkeypatch):
+    monkeypatch.setattr(admission_module, "admission", Admission(max_inflight=1))
+    monkeypatch.setattr(admission_module, "peer_admission", Admission())
+    release = asyncio.Event()
+
+    async def slow(request):
+        await release.wait()
+        return web.json_response({"ok": True})
+
+    async def nodes(request):
+        return web.json_response([])
+
+    async def main():
+        app = web.Application(middlewares=[admit_writes])
+        app.router.add_post("/submit_transaction", slow)
+        app.router.add_get("/nodes", nodes)
+        async with TestClient(TestServer(app)) as client:
+            first = asyncio.create_task(client.post("/submit_transaction"))
+            while admission_module.admission.inflight == 0:
+                await asyncio.sleep(0.01)
+            busy = await client.post("/submit_transaction")
+            assert busy.status == 503 and busy.headers["Retry-After"] == "1"
+            assert (await client.get("/nodes")).status == 200  # reads are not limited
+            release.set()
+            assert (await first).status == 200
+            assert admission_module.admission.stats()["shed"] == 1
+
+    asyncio.run(main())
+
+
+def test_a_client_flood_does_not_refuse_the_votes_a_proposal_needs(monkeypatch):
+    monkeypatch.setattr(admission_module, "admission", Admission(client_rate=0.01, client_burst=5))
+    monkeypatch.setattr(admission_module, "peer_admission", Admission())
+    flooded = asyncio.Event()
+    node = {}  # the client session and /vote url, once the server is up
+
+    async def submit(request):
+        return web.json_response({"ok": True})
+
+    async def vote(request):
+        return web.json_response({"vote": True})
+
+    async def propose(request):
+        await flooded.wait()
+        # Like commit_block: the node's own vote comes back to it over HTTP from the same address
+        async with node["session"].post(node["vote_url"], json={}) as reply:
+            if reply.status != 200:
+                return web.json_response({"error": "Block rejected by consensus"}, status=400)
+        return web.json_response({"committed": True})
+
+    async def main():
+        app = web.Application(middlewares=[admit_writes])
+        app.router.add_post("/submit_transaction", submit)
+        app.router.add_post("/propose_block", propose)
+        app.router.add_post("/vote", vote)
+        async with TestClient(TestServer(app)) as client:
+            node.update(session=client.session, vote_url=str(client.make_url("/vote")))
+            proposal = asyncio.create_task(client.post("/propose_block"))
+            while admission_module.admission.inflight == 0:
+                await asyncio.sleep(0.01)
+            statuses = [(await client.post("/submit_transaction")).status for _ in range(20)]
+            assert statuses == [200] * 4 + [429] * 16
+            flooded.set()
+            assert (await proposal).status == 200
+            assert admission_module.peer_admission.stats()["admitted"] == 1
+
+    asyncio.run(main())
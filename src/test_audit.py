@@ -0,0 +1,58 @@
+import asyncio
+import sqlite3
+import time
+import audit
+import database
+from block import Block, decode_block, encode_block
+from consensus import POA_WINDOW, poa_from_hashes
+
+
+def build_chain(db_path, count):
+    """Commit `count` linked blocks with valid PoA, each holding two transactions."""
+    async def main():
+        await database.init_db()
+        hashes = []
+        try:
+            for index in range(1, count + 1):
+                data = [{"tx_id": f"TX{index}-{i}", "sender": database.GENESIS_SENDER,
+                         "receiver": "alice", "amount": 1} for i in range(2)]
+                block = Block(index, hashes[-1] if hashes else "0", time.time(), data, "tester",
+                              poa_from_hashes(hashes[-POA_WINDOW:]) if hashes else "GENESIS_PoA")
+                assert await database.insert_block(block)
+                hashes.append(block.hash)
+        finally:
+            await database.close_db()
+
+    asyncio.run(main())
+
+
+def test_audit_finds_tampering_across_ranges(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "chain.db")
+    monkeypatch.setattr(database, "DB_PATH", db_path)
+    monkeypatch.setattr(database, "block_cache", database.BlockCache())
+    build_chain(db_path, 30)
+
+    report = audit.audit_chain(db_path, workers=2, range_size=7)
+    assert (report["blocks"], report["errors"]) == (30, [])
+
+    con = sqlite3.connect(db_path)
+    # Change a transaction but keep the stored hash
+    block = decode_block(con.execute("SELECT data FROM blockchain WHERE block_index = 12").fetchone()[0])
+    data = [dict(block.data[0], amount=1000), block.data[1]]
+    forged = encode_block(Block(12, block.previous_hash, block.timestamp, data, block.proposer,
+                                block.proof_of_accuracy, block.hash))
+    con.execute("UPDATE blockchain SET data = ? WHERE block_index = 12", (forged,))
+    # Block 20 repeats a transaction of block 3
+    block = decode_block(con.execute("SELECT data FROM blockchain WHERE block_index = 20").fetchone()[0])
+    data = [block.data[0], {"tx_id": "TX3-1", "sender": database.GENESIS_SENDER, "receiver": "alice", "amount": 1}]
+    forged = encode_block(Block(20, block.previous_hash, block.timestamp, data, block.proposer,
+                                block.proof_of_accuracy, block.hash))
+    con.execute("UPDATE blockchain SET data = ? WHERE block_index = 20", (forged,))
+    con.commit()
+    con.close()
+
+    errors = audit.audit_chain(db_path, workers=2, range_size=7)["errors"]
+    assert "Block 12: stored hash does not match its contents" in errors
+    assert "Block 20: stored hash does not match its contents" in errors
+    assert any(error.startswith("Duplicate transaction id: TX3-1 in block 20") for error in errors)
+    assert len(errors) == 3
@@ -0,0 +1,92 @@
+import json
+import time
+from block import Block, decode_block, encode_block, merkle_proof, verify_merkle_proof, verify_transaction_proof
+
+
+def make_block(index, count=3):
+    data = [{"tx_id": f"TX{index}-{i}", "sender": "alice", "receiver": "bob",
+             "amount": 1.5 + i, "fee": 0.1, "nonce": i} for i in range(count)]
+    return Block(index, "ab" * 32, time.time(), data, "proposer", "GENESIS_PoA")
+
+
+def test_binary_encoding_round_trips():
+    block = make_block(7)
+    decoded = decode_block(encode_block(block))
+    assert decoded.to_dict() == block.to_dict()
+
+
+def test_header_decode_leaves_transactions_encoded():
+    encoded = bytearray(encode_block(make_block(3)))
+    block = decode_block(encoded)
+    assert (block.block_index, block.tx_count, block.proposer) == (3, 3, "proposer")
+    # Corrupting the tx records goes unnoticed until the transactions are read
+    encoded[-2:] = b"!!"
+    assert block.block_index == 3
+    try:
+        block.data
+    except json.JSONDecodeError:
+        pass
+    else:
+        raise AssertionError("transactions were decoded eagerly")
+
+
+def test_encoding_keeps_none_fields():
+    block = Block(1, None, 0.0, [], "proposer")
+    decoded = decode_block(encode_block(block))
+    assert decoded.to_dict() == block.to_dict()
+
+
+def test_compressed_sections_round_trip():
+    block = make_block(5, count=40)
+    raw = encode_block(block)
+    for codec in ("zlib", "lzma"):
+        encoded = encode_block(block, codec)
+        assert len(encoded) < len(raw)
+        assert decode_block(encoded).to_dict() == block.to_dict()
+    # Sections below min_size are left uncompressed
+    assert encode_block(block, "zlib", min_size=len(raw)) == raw
+
+
+def test_version_1_blocks_still_decode():
+    block = make_block(2)
+    encoded = encode_block(block)
+    # Version 1 had no codec byte in front of the tx records
+    codec_at = len(encode_block(make_block(2, count=0))) - 1
+    v1 = b"\x01" + encoded[1:codec_at] + encoded[codec_at + 1:]
+    assert decode_block(v1).to_dict() == block.to_dict()
+
+
+def test_hash_is_canonical_and_survives_storage():
+    block = make_block(4)
+    reordered = Block(4, block.previous_hash, block.timestamp,
+                      [dict(reversed(list(tx.items()))) for tx in block.data], "proposer", "GENESIS_PoA")
+    assert reordered.hash == block.hash == block.calculate_hash()
+    assert decode_block(encode_block(block, "zlib")).hash == block.hash
+    assert Block(4, block.previous_hash, block.timestamp, [], "proposer", "GENESIS_PoA").hash != block.hash
+
+
+def test_blocks_are_immutable():
+    block = make_block(1)
+    for name in ("block_index", "hash", "data"):
+        try:
+            setattr(block, name, None)
+        except AttributeError:
+            pass
+        else:
+            raise AssertionError(f"{name} could be reassigned")
+    assert block.to_dict() is block.to_dict()
+
+
+def test_merkle_proofs_verify_for_every_position():
+    for count in range(1, 10):
+        block = make_block(1, count)
+        levels = block.merkle_levels()
+        for position, tx in enumerate(block.data):
+            proof = merkle_proof(levels, position)
+            assert len(proof) == len(levels) - 1
+            assert verify_merkle_proof(tx, proof, block.merkle_root)
+            assert verify_transaction_proof(tx, proof, block.header().decode(), block.hash)
+            assert not verify_merkle_proof(dict(tx, amount=tx["amount"] + 1), proof, block.merkle_root)
+    block = make_block(1, 4)
+    proof = merkle_proof(block.merkle_levels(), 0)
+    assert not verify_transaction_proof(block.data[0], proof, block.header().decode(), "00" * 32)
@@ -0,0 +1,42 @@
+import asyncio
+import hashlib
+import database
+from block import Block
+from consensus import PoAWindow
+
+
+def make_block(index):
+    return Block(index, "0", float(index), [], "tester", "poa")
+
+
+def expected_poa(blocks):
+    return hashlib.sha256(",".join(block.hash for block in blocks).encode()).hexdigest()
+
+
+def test_window_load_does_not_miss_a_racing_commit(monkeypatch):
+    chain = [make_block(1), make_block(2)]
+    window = PoAWindow(size=5)
+    reads = []
+
+    async def get_recent_blocks(limit=5):
+        snapshot = list(reversed(chain))[:limit]
+        if not reads:
+            # Block 3 commits after the first read, before the window is filled
+            chain.append(make_block(3))
+            window.push(chain[-1])
+        reads.append(snapshot)
+        return snapshot
+
+    monkeypatch.setattr(database, "get_recent_blocks", get_recent_blocks)
+    assert asyncio.run(window.expected()) == expected_poa(chain)
+    assert len(reads) == 2
+
+
+def test_window_orders_out_of_order_commits():
+    window = PoAWindow(size=3)
+    window.loaded = True
+    blocks = [make_block(i) for i in range(1, 5)]
+    for i in (0, 2, 1, 3):
+        window.push(blocks[i])
+    window.push(blocks[2])
+    assert asyncio.run(window.expected()) == expected_poa(blocks[1:])
@@ -0,0 +1,235 @@
+import asyncio
+import json
+import time
+import database
+from block import Block, verify_transaction_proof
+
+
+class FakeClient:
+    """Stands in for the libsql client; records every batch it commits."""
+
+    def __init__(self, gate=None):
+        self.batches = []
+        self.gate = gate
+
+    async def batch(self, statements):
+        if self.gate is not None:
+            await self.gate.wait()
+        self.batches.append(list(statements))
+        return [f"result {stmt}" for stmt in statements]
+
+
+def make_block(index, data=()):
+    return Block(index, "0", time.time(), list(data), "tester", "poa")
+
+
+def test_write_queue_merges_concurrent_writes(monkeypatch):
+    monkeypatch.setattr(database, "client", FakeClient(), raising=False)
+    queue = database.WriteQueue()
+
+    async def main():
+        database.client.gate = asyncio.Event()
+        first = asyncio.ensure_future(queue.submit(["write 0"]))
+        await asyncio.sleep(0.05)
+        # The first batch holds the writer; the remaining writes queue up behind it.
+        rest = [asyncio.ensure_future(queue.submit([f"write {i}"])) for i in range(1, 8)]
+        await asyncio.sleep(0.01)
+        database.client.gate.set()
+        results = await asyncio.gather(first, *rest)
+        await queue.stop()
+        return results
+
+    assert asyncio.run(main()) == [[f"result write {i}"] for i in range(8)]
+    assert sum(len(batch) for batch in database.client.batches) == 8
+    assert queue.writes == 8 and queue.batches == 2
+
+
+def test_write_queue_stop_flushes_pending_writes(monkeypatch):
+    client = FakeClient()
+    monkeypatch.setattr(database, "client", client, raising=False)
+    queue = database.WriteQueue()
+
+    async def main():
+        client.gate = asyncio.Event()
+        pending = [asyncio.ensure_future(queue.submit([f"write {i}"])) for i in range(3)]
+        await asyncio.sleep(0.05)
+        client.gate.set()
+        await queue.stop()
+        return await asyncio.gather(*pending)
+
+    assert asyncio.run(main()) == [[f"result write {i}"] for i in range(3)]
+    assert sum(len(batch) for batch in client.batches) == 3
+
+
+def test_reads_during_group_commits_never_find_the_database_busy(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "chain.db"))
+    monkeypatch.setattr(database, "block_cache", database.BlockCache())
+
+    async def main():
+        await database.init_db()
+        try:
+            async def commits():
+                for i in range(1, 41):
+                    assert await database.insert_block(make_block(i, [
+                        {"tx_id": f"G{i}", "sender": database.GENESIS_SENDER, "receiver": "a", "amount": 1},
+                    ]))
+
+            async def reads():
+                pages = 0
+                for _ in range(200):
+                    await database.get_blocks_page(0, 50)
+                    pages += 1
+                    await asyncio.sleep(0)
+                return pages
+
+            _, *pages = await asyncio.gather(commits(), reads(), reads())
+            assert pages == [200, 200]
+            assert len(await database.get_blocks_page(0, 100)) == 40
+        finally:
+            await database.close_db()
+
+    asyncio.run(main())
+
+
+def test_recent_block_load_does_not_cache_a_stale_tip(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "chain.db"))
+    monkeypatch.setattr(database, "block_cache", database.BlockCache())
+
+    async def main():
+        await database.init_db()
+        await database.insert_block(make_block(1))
+        read_done, release = asyncio.Event(), asyncio.Event()
+        execute = database.client.execute
+
+        async def slow_execute(stmt, args=None):
+            result = await execute(stmt, args)
+            if "FROM blockchain" in stmt and not release.is_set():
+                read_done.set()
+                await release.wait()
+            return result
+
+        monkeypatch.setattr(database.client, "execute", slow_execute)
+        tip = asyncio.ensure_future(database.get_last_block())
+        await read_done.wait()
+        # Block 2 commits after the load has read the table but before it fills the cache.
+        await database.insert_block(make_block(2))
+        release.set()
+        try:
+            assert (await tip)["block_index"] == 2
+            assert (await database.get_last_block())["block_index"] == 2
+            assert [block.block_index for block in await database.get_recent_blocks(5)] == [2, 1]
+        finally:
+            await database.close_db()
+
+    asyncio.run(main())
+
+
+def test_accounts_backfill_replays_committed_transactions(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "chain.db"))
+    monkeypatch.setattr(database, "block_cache", database.BlockCache())
+
+    async def main():
+        await database.init_db()
+        await database.insert_block(make_block(1, [
+            {"tx_id": "G1", "sender": database.GENESIS_SENDER, "receiver": "alice", "amount": 100},
+        ]))
+        await database.insert_block(make_block(2, [
+            {"tx_id": "T1", "sender": "alice", "receiver": "bob", "amount": 30, "fee": 2},
+            {"tx_id": "T2", "sender": "alice", "receiver": "bob", "amount": 10, "fee": 1},
+        ]))
+        try:
+            committed = await database.get_accounts(["alice", "bob", "tester"])
+            # A node from before balances were tracked starts with an empty table
+            await database.client.execute("DELETE FROM accounts")
+            await database.backfill_accounts()
+            assert await database.get_accounts(["alice", "bob", "tester"]) == committed
+            assert committed["alice"] == {"balance": 57, "nonce": 2}
+            assert committed["tester"]["balance"] == 3
+        finally:
+            await database.close_db()
+
+    asyncio.run(main())
+
+
+def test_spent_filter_has_no_false_negatives():
+    spent = database.SpentFilter(capacity=1000, fp_rate=0.01)
+    for i in range(1000):
+        spent.add(f"TX{i}")
+    assert all(f"TX{i}" in spent for i in range(1000))
+    false_positives = sum(f"other{i}" in spent for i in range(10000))
+    assert false_positives < 300
+
+
+def test_spent_transactions_survive_a_restart(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "chain.db"))
+    monkeypatch.setattr(database, "block_cache", database.BlockCache())
+
+    async def main():
+        await database.init_db()
+        await database.insert_block(make_block(1, [
+            {"tx_id": "G1", "sender": database.GENESIS_SENDER, "receiver": "alice", "amount": 100},
+        ]))
+        await database.mark_transaction_as_spent("M1")
+        await database.close_db()
+        # The filter is rebuilt from the table when the node starts again
+        monkeypatch.setattr(database, "spent_filter", database.SpentFilter(capacity=10))
+        await database.init_db()
+        try:
+            assert await database.spent_transactions(["G1", "M1", "T9"]) == {"G1", "M1"}
+            assert not await database.is_transaction_spent("T9")
+        finally:
+            await database.close_db()
+
+    asyncio.run(main())
+
+
+def test_blocks_are_stored_binary_and_legacy_rows_still_read(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "chain.db"))
+    monkeypatch.setattr(database, "block_cache", database.BlockCache())
+
+    async def main():
+        await database.init_db()
+        try:
+            # A row written by an older node, with the transactions as JSON text
+            await database.client.batch([
+                ("INSERT INTO blockchain VALUES (1, '0', 1.0, ?, 'GENESIS', 'GENESIS_PoA')",
+                 (json.dumps([{"tx_id": "G1"}]),)),
+                "UPDATE metadata SET value = '1' WHERE key = 'last_block'",
+            ])
+            block = make_block(2, [{"tx_id": "T1", "sender": database.GENESIS_SENDER, "receiver": "b", "amount": 1}])
+            assert await database.insert_block(block)
+            stored = (await database.client.execute("SELECT data FROM blockchain WHERE block_index = 2")).rows[0][0]
+            assert isinstance(stored, bytes)
+            # Only the block right after the tip may be committed
+            assert not await database.insert_block(make_block(4))
+            blocks = [b async for b in database.iter_blocks()]
+            assert [b.block_index for b in blocks] == [1, 2]
+            assert blocks[0].data == [{"tx_id": "G1"}]
+            assert blocks[1].to_dict() == block.to_dict()
+        finally:
+            await database.close_db()
+
+    asyncio.run(main())
+
+
+def test_transaction_proof_verifies_against_the_block_hash(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "chain.db"))
+    monkeypatch.setattr(database, "block_cache", database.BlockCache(size=1))
+
+    async def main():
+        await database.init_db()
+        txs = [{"tx_id": f"G{i}", "sender": database.GENESIS_SENDER, "receiver": "alice", "amount": i + 1}
+               for i in range(5)]
+        genesis = make_block(1, txs)
+        await database.insert_block(genesis)
+        await database.insert_block(make_block(2))
+        try:
+            # Block 1 is no longer in the recent-block cache and is read from disk
+            proof = await database.get_transaction_proof("G3")
+            assert (proof["block_index"], proof["position"], proof["tx"]) == (1, 3, txs[3])
+            assert verify_transaction_proof(proof["tx"], proof["proof"], proof["header"], genesis.hash)
+            assert await database.get_transaction_proof("missing") is None
+        finally:
+            await database.close_db()
+
+    asyncio.run(main())
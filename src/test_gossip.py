@@ -0,0 +1,36 @@
+import asyncio
+import time
+from gossip import Gossip
+
+
+def test_seen_ids_are_bounded_and_kept_per_kind():
+    gossip = Gossip(limit=2)
+    assert gossip.mark_seen("block", "a") and not gossip.mark_seen("block", "a")
+    assert gossip.mark_seen("tx", "a")
+    assert gossip.mark_seen("tx", "b")
+    assert not gossip.has_seen("block", "a") and gossip.has_seen("tx", "b")
+    assert not gossip.mark_seen("tx", None) and not gossip.has_seen("tx", None)
+
+
+def test_relay_sends_to_a_random_fanout(monkeypatch):
+    sent = []
+
+    async def broadcast(peers, path, payload):
+        sent.append(peers)
+        return [peer for peer in peers if peer == "down"]
+
+    monkeypatch.setattr("gossip.peer_client.broadcast", broadcast)
+    gossip = Gossip(fanout=2)
+
+    async def main():
+        gossip.relay(["a", "b", "c", "down"], "/receive_block", {})
+        gossip.relay(["down"], "/receive_block", {})
+        gossip.relay([], "/receive_block", {})
+        await asyncio.gather(*gossip._tasks)
+
+    asyncio.run(main())
+    assert [len(targets) for targets in sent] == [2, 1]
+    assert gossip.relayed + gossip.failed == 3 and gossip.failed >= 1
+
+    gossip.record_delay(time.time() - 0.05)
+    assert 50 <= gossip.latency()["mean_ms"] < 1000
@@ -0,0 +1,124 @@
+import asyncio
+import time
+from nacl.signing import SigningKey
+import database
+from block import Block
+from consensus import PoAWindow, poa_from_hashes
+from ingest import APPLIED, BUFFERED, KNOWN, REJECTED, BlockIngest
+from transaction import address_of, sign_transaction
+
+ALICE = SigningKey.generate()
+
+
+def make_tx(tx_id, nonce, key=ALICE, amount=1):
+    tx = {"tx_id": tx_id, "sender": address_of(key), "receiver": "bob", "amount": amount, "fee": 0, "nonce": nonce}
+    return dict(tx, signature=sign_transaction(tx, key))
+
+
+def next_block(parent, hashes, txs, **overrides):
+    """A block extending `parent` with the PoA over `hashes`, as a peer would send it."""
+    fields = dict(block_index=parent.block_index + 1, previous_hash=parent.hash, timestamp=time.time(),
+                  data=txs, proposer="peer", proof_of_accuracy=poa_from_hashes(hashes[-5:]))
+    fields.update(overrides)
+    return Block(**fields)
+
+
+def setup(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "chain.db"))
+    monkeypatch.setattr(database, "block_cache", database.BlockCache())
+    window = PoAWindow()
+    monkeypatch.setattr("ingest.poa_window", window)
+    monkeypatch.setattr(database, "commit_listeners", [window.push])
+    return Block(1, "0", time.time(), [
+        {"tx_id": "G1", "sender": database.GENESIS_SENDER, "receiver": address_of(ALICE), "amount": 100, "fee": 0},
+    ], "GENESIS", "GENESIS_PoA")
+
+
+def test_out_of_order_blocks_are_buffered_and_committed_as_one_run(tmp_path, monkeypatch):
+    genesis = setup(tmp_path, monkeypatch)
+
+    async def main():
+        await database.init_db()
+        await database.insert_block(genesis)
+        try:
+            ingest = BlockIngest()
+            chain, hashes = [genesis], [genesis.hash]
+            for i in range(3):
+                chain.append(next_block(chain[-1], hashes, [make_tx(f"T{i}", i)]))
+                hashes.append(chain[-1].hash)
+
+            assert (await ingest.receive(chain[3].to_dict()))[0] == BUFFERED
+            assert (await ingest.receive(chain[2].to_dict()))[0] == BUFFERED
+            commits = database.commit_stats["commits"]
+            assert await ingest.receive(chain[1].to_dict()) == (APPLIED, {"applied": [2, 3, 4]})
+            assert database.commit_stats["commits"] == commits + 1
+            assert ingest.future == {}
+            assert (await database.get_account(address_of(ALICE)))["nonce"] == 3
+            assert (await ingest.receive(chain[2].to_dict()))[0] == KNOWN
+        finally:
+            await database.close_db()
+
+    asyncio.run(main())
+
+
+def test_each_stage_rejects_a_bad_block(tmp_path, monkeypatch):
+    genesis = setup(tmp_path, monkeypatch)
+
+    async def main():
+        await database.init_db()
+        await database.insert_block(genesis)
+        try:
+            ingest = BlockIngest(limit=4)
+            hashes = [genesis.hash]
+            good = next_block(genesis, hashes, [make_tx("T0", 0)])
+            tampered = dict(good.to_dict(), data=[make_tx("T0", 0, key=SigningKey.generate())])
+            forged = make_tx("T0", 0)
+            forged["signature"] = sign_transaction(dict(forged, amount=2), ALICE)
+            cases = {
+                "structure": dict(good.to_dict(), data=[]),
+                "hash": tampered,
+                "linkage": next_block(genesis, hashes, [make_tx("T0", 0)], previous_hash="f" * 64).to_dict(),
+                "poa": next_block(genesis, hashes, [make_tx("T0", 0)], proof_of_accuracy="bogus").to_dict(),
+                "double-spend": next_block(genesis, hashes, [make_tx("T0", 0), make_tx("T0", 1)]).to_dict(),
+                "nonce": next_block(genesis, hashes, [make_tx("T0", 1)]).to_dict(),
+                "balance": next_block(genesis, hashes, [make_tx("T0", 0, amount=101)]).to_dict(),
+                "signature": next_block(genesis, hashes, [forged]).to_dict(),
+                "position": dict(good.to_dict(), block_index=9),
+            }
+            for stage, block_data in cases.items():
+                if stage == "position":
+                    block_data["hash"] = Block(**{k: block_data[k] for k in (
+                        "block_index", "previous_hash", "timestamp", "data", "proposer", "proof_of_accuracy")}).hash
+                outcome, detail = await ingest.receive(block_data)
+                assert (outcome, detail["stage"]) == (REJECTED, stage)
+            assert ingest.rejected == {stage: 1 for stage in cases}
+            assert (await ingest.receive(good.to_dict()))[0] == APPLIED
+        finally:
+            await database.close_db()
+
+    asyncio.run(main())
+
+
+def test_a_run_is_cut_at_a_block_that_overdraws_its_sender(tmp_path, monkeypatch):
+    genesis = setup(tmp_path, monkeypatch)
+
+    async def main():
+        await database.init_db()
+        await database.insert_block(genesis)
+        try:
+            ingest = BlockIngest()
+            chain, hashes = [genesis], [genesis.hash]
+            for i, amount in enumerate((60, 60, 1)):
+                chain.append(next_block(chain[-1], hashes, [make_tx(f"T{i}", i, amount=amount)]))
+                hashes.append(chain[-1].hash)
+
+            for block in (chain[3], chain[2]):
+                assert (await ingest.receive(block.to_dict()))[0] == BUFFERED
+            # Block 3 overdraws Alice; block 2 is still committed and block 4, built on 3, is dropped
+            assert await ingest.receive(chain[1].to_dict()) == (APPLIED, {"applied": [2]})
+            assert ingest.rejected == {"balance": 1} and ingest.future == {}
+            assert await database.get_account(address_of(ALICE)) == {"balance": 40, "nonce": 1}
+        finally:
+            await database.close_db()
+
+    asyncio.run(main())
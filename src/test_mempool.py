@@ -0,0 +1,165 @@
+import asyncio
+import time
+from nacl.signing import SigningKey
+import database
+from block import Block
+from blockchain import NONCE_AHEAD, screen_transactions
+from mempool import ADDED, DUPLICATE, OUTBID, Mempool
+from transaction import address_of, sign_transaction
+
+
+def make_tx(tx_id, fee=0.1, key=None, nonce=0, amount=1):
+    tx = {"tx_id": tx_id, "sender": address_of(key) if key else "alice", "receiver": "bob",
+          "amount": amount, "fee": fee, "nonce": nonce, "signature": ""}
+    if key:
+        tx["signature"] = sign_transaction(tx, key)
+    return tx
+
+
+def test_mempool_serves_highest_fee_first_and_evicts_lowest():
+    async def main():
+        pool = Mempool(max_size=3)
+        assert [pool.add(make_tx(f"T{fee}", fee)) for fee in (2, 1, 3)] == [ADDED] * 3
+        assert pool.add(make_tx("T2", 2)) == DUPLICATE
+        assert pool.add(make_tx("T0", 0.5)) == OUTBID
+        assert pool.add(make_tx("T5", 5)) == ADDED
+        assert "T1" not in pool and pool.evicted == 1
+        taken = await pool.take(2, timeout=0)
+        assert [tx["tx_id"] for tx, _ in taken] == ["T5", "T3"]
+        assert len(pool) == 1
+
+    asyncio.run(main())
+
+
+def test_take_cuts_on_size_or_time():
+    async def main():
+        pool = Mempool()
+
+        async def fill():
+            await asyncio.sleep(0.05)
+            for i in range(3):
+                pool.add(make_tx(f"T{i}"))
+
+        start = time.monotonic()
+        filler = asyncio.create_task(fill())
+        assert len(await pool.take(3, timeout=5)) == 3
+        assert time.monotonic() - start < 1
+        await filler
+
+        pool.add(make_tx("T9"))
+        start = time.monotonic()
+        assert len(await pool.take(3, timeout=0.1)) == 1
+        assert time.monotonic() - start >= 0.1
+
+    asyncio.run(main())
+
+
+def test_expired_transactions_are_dropped_even_when_put_back():
+    async def main():
+        pool = Mempool(ttl=60)
+        pool.add(make_tx("old"), since=time.monotonic() - 120)
+        pool.add(make_tx("new"))
+        assert [tx["tx_id"] for tx, _ in await pool.take(5, timeout=0)] == ["new"]
+        assert pool.expired == 1
+
+    asyncio.run(main())
+
+
+def test_screening_orders_nonces_and_explains_rejections(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "chain.db"))
+    monkeypatch.setattr(database, "block_cache", database.BlockCache())
+    alice, bob = SigningKey.generate(), SigningKey.generate()
+
+    async def main():
+        await database.init_db()
+        await database.insert_block(Block(1, "0", time.time(), [
+            {"tx_id": "G1", "sender": database.GENESIS_SENDER, "receiver": address_of(alice), "amount": 10, "fee": 0},
+            {"tx_id": "G2", "sender": database.GENESIS_SENDER, "receiver": address_of(bob), "amount": 1, "fee": 0},
+        ], "GENESIS", "GENESIS_PoA"))
+        try:
+            txs = [
+                make_tx("A1", key=alice, nonce=1),
+                make_tx("A0", key=alice, nonce=0),
+                make_tx("A3", key=alice, nonce=3),
+                dict(make_tx("A2", key=alice, nonce=2), amount=2),  # signature no longer matches
+                make_tx("B0", key=bob, nonce=0, amount=5),
+                make_tx("B1", key=bob, nonce=1),
+                make_tx("G1", key=bob, nonce=0),
+            ]
+            accepted, rejected = await screen_transactions(txs)
+            assert [tx["tx_id"] for tx in accepted] == ["A0", "A1"]
+            assert rejected == {
+                "A2": "Invalid signature",
+                "A3": NONCE_AHEAD,
+                "B0": "Insufficient balance",
+                "B1": NONCE_AHEAD,
+                "G1": "Double spend",
+            }
+        finally:
+            await database.close_db()
+
+    asyncio.run(main())
+
+
+def test_account_read_errors_propagate_instead_of_rejecting(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "chain.db"))
+    monkeypatch.setattr(database, "block_cache", database.BlockCache())
+    alice = SigningKey.generate()
+
+    async def main():
+        await database.init_db()
+        execute = database.client.execute
+
+        async def failing_execute(stmt, args=None):
+            if "FROM accounts" in stmt:
+                raise RuntimeError("SQLITE_BUSY: database is locked")
+            return await execute(stmt, args)
+
+        monkeypatch.setattr(database.client, "execute", failing_execute)
+        try:
+            for read in (database.get_account(address_of(alice)),
+                         screen_transactions([make_tx("A0", key=alice, nonce=0)])):
+                try:
+                    await read
+                except RuntimeError:
+                    continue
+                raise AssertionError("a failed account read looked like an empty account")
+        finally:
+            await database.close_db()
+
+    asyncio.run(main())
+
+
+def test_bulk_admission_reports_each_transaction(tmp_path, monkeypatch):
+    import node
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "chain.db"))
+    monkeypatch.setattr(database, "block_cache", database.BlockCache())
+    monkeypatch.setattr(node, "mempool", Mempool(max_size=3))
+    alice = SigningKey.generate()
+
+    async def main():
+        await database.init_db()
+        await database.insert_block(Block(1, "0", time.time(), [
+            {"tx_id": "G1", "sender": database.GENESIS_SENDER, "receiver": address_of(alice), "amount": 100, "fee": 0},
+        ], "GENESIS", "GENESIS_PoA"))
+        try:
+            txs = [make_tx(f"A{i}", key=alice, nonce=i, fee=i) for i in range(4)]
+            results = await node.admit_transactions([
+                txs[0], None, {"tx_id": "X"}, txs[0], txs[2], txs[1], make_tx("G1", key=alice), txs[3], txs[3],
+            ])
+            assert [(r["tx_id"], r["status"], r.get("error")) for r in results] == [
+                ("A0", "added", None),
+                (None, "rejected", "Invalid JSON"),
+                ("X", "rejected", "Invalid transaction format"),
+                ("A0", "duplicate", None),
+                ("A2", "added", None),  # waits in the mempool for A1
+                ("A1", "added", None),
+                ("G1", "rejected", "Double spend"),
+                ("A3", "added", None),  # evicts A0, the lowest fee
+                ("A3", "duplicate", None),
+            ]
+            assert node.mempool.evicted == 1
+        finally:
+            await database.close_db()
+
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+import asyncio
+import time
+from peers import PeerClient, PeerRegistry
+
+
+def fake_votes(client, monkeypatch, replies):
+    """Peer `name` answers replies[name] = (delay, vote)."""
+    async def vote(peer, body):
+        delay, approve = replies[peer]
+        await asyncio.sleep(delay)
+        return approve
+    monkeypatch.setattr(client, "_vote", vote)
+
+
+def test_quorum_returns_without_waiting_for_the_slowest_peer(monkeypatch):
+    client = PeerClient()
+    fake_votes(client, monkeypatch, {"a": (0.01, True), "b": (0.02, True), "c": (5, True)})
+    start = time.perf_counter()
+    assert asyncio.run(client.collect_votes(["a", "b", "c"], {})) is True
+    assert time.perf_counter() - start < 1
+
+
+def test_rejection_is_settled_early_and_failures_vote_against(monkeypatch):
+    client = PeerClient()
+    fake_votes(client, monkeypatch, {"a": (0.01, False), "b": (0.02, False), "c": (5, True)})
+    start = time.perf_counter()
+    assert asyncio.run(client.collect_votes(["a", "b", "c"], {})) is False
+    assert time.perf_counter() - start < 1
+
+    fake_votes(client, monkeypatch, {"a": (0, True), "b": (0, False)})
+    assert asyncio.run(client.collect_votes(["a", "b"], {})) is False
+
+
+def test_broadcast_reports_failed_peers(monkeypatch):
+    client = PeerClient()
+
+    async def post(peer, path, body):
+        if peer == "down":
+            raise asyncio.TimeoutError()
+        return (200 if peer == "up" else 500), None
+
+    monkeypatch.setattr(client, "post", post)
+    assert asyncio.run(client.broadcast(["up", "down", "broken"], "/receive_block", {})) == ["down", "broken"]
+
+
+def test_registry_orders_by_latency_and_evicts_failing_peers(monkeypatch):
+    registry = PeerRegistry(alpha=0.5, max_failures=2, dead_after=60)
+    registry.update(["slow", "fast", "new", "flaky"])
+    registry.record_success("slow", 0.2)
+    registry.record_success("fast", 0.1)
+    registry.record_success("fast", 0.3)  # EWMA 0.2, then
+    registry.record_success("fast", 0.0)  # 0.1
+    registry.record_success("flaky", 0.3)
+    registry.record_failure("flaky")
+    # "new" has never answered, so it gets no vote yet, but is not evicted either
+    assert registry.healthy() == ["fast", "slow", "flaky"]
+
+    registry.record_failure("flaky")
+    assert registry.healthy(exclude=("slow",)) == ["fast"]
+    assert registry.evict() == ["flaky"] and "flaky" not in registry and "new" in registry
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 120)
+    assert registry.evict(keep=("slow",)) == ["fast", "new"]
+    assert [peer["url"] for peer in registry.snapshot()] == ["slow"]
+
+
+def test_registrations_per_source_are_capped_until_evicted(monkeypatch):
+    registry = PeerRegistry(limit_per_source=2, dead_after=60)
+    assert [registry.add(f"http://spam-{i}", "10.0.0.1") for i in range(3)] == [True, True, False]
+    assert registry.add("http://other", "10.0.0.2") and registry.add("http://configured")
+    assert registry.healthy() == []
+
+    registry.record_success("http://spam-0", 0.1)
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 30)
+    registry.record_success("http://spam-0", 0.1)
+    monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+    assert registry.evict() == ["http://spam-1", "http://other", "http://configured"]
+    assert registry.sources == {"10.0.0.1": 1}
+    assert registry.add("http://spam-2", "10.0.0.1")
+
+
+def test_client_calls_update_the_registry():
+    registry = PeerRegistry()
+    client = PeerClient(timeout=0.5, registry=registry)
+    registry.add("http://127.0.0.1:9")  # discard port, nothing listens
+
+    async def main():
+        try:
+            await client.get("http://127.0.0.1:9", "/nodes")
+        except Exception:
+            pass
+        await client.close()
+
+    asyncio.run(main())
+    assert registry.snapshot()[0]["failures"] == 1
@@ -0,0 +1,37 @@
+import asyncio
+import json
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+from response_cache import ResponseCache
+
+
+def test_bodies_are_reused_until_the_tip_changes_and_match_with_304():
+    cache = ResponseCache()
+    state = {"tip": "aaa", "builds": 0}
+
+    async def handler(request):
+        async def build():
+            state["builds"] += 1
+            return json.dumps({"tip": state["tip"]}).encode()
+        return await cache.respond(request, "tip", state["tip"], build, f'"tip-{state["tip"]}"')
+
+    async def main():
+        app = web.Application()
+        app.router.add_get("/tip", handler)
+        async with TestClient(TestServer(app)) as client:
+            first = await client.get("/tip")
+            assert first.headers["ETag"] == '"tip-aaa"' and await first.json() == {"tip": "aaa"}
+            assert (await client.get("/tip")).status == 200
+            unchanged = await client.get("/tip", headers={"If-None-Match": 'W/"tip-aaa", "other"'})
+            assert unchanged.status == 304 and await unchanged.read() == b""
+            assert state["builds"] == 1
+
+            state["tip"] = "bbb"
+            changed = await client.get("/tip", headers={"If-None-Match": '"tip-aaa"'})
+            assert changed.status == 200 and await changed.json() == {"tip": "bbb"}
+            cache.invalidate()
+            assert (await client.get("/tip")).status == 200
+            assert state["builds"] == 3
+            assert (cache.hits, cache.misses, cache.not_modified) == (1, 3, 1)
+
+    asyncio.run(main())
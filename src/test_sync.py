@@ -0,0 +1,66 @@
+import asyncio
+import json
+import time
+from urllib.parse import parse_qs, urlsplit
+import database
+from block import Block
+from consensus import PoAWindow, poa_from_hashes
+from sync import ChainSync
+from test_ingest import ALICE, make_tx
+from transaction import address_of
+
+
+def build_chain(length):
+    """A genesis block funding ALICE and `length - 1` blocks spending from it."""
+    chain = [Block(1, "0", time.time(), [
+        {"tx_id": "G1", "sender": database.GENESIS_SENDER, "receiver": address_of(ALICE), "amount": 100, "fee": 0},
+    ], "GENESIS", "GENESIS_PoA")]
+    for nonce in range(length - 1):
+        hashes = [block.hash for block in chain[-5:]]
+        chain.append(Block(len(chain) + 1, chain[-1].hash, time.time(), [make_tx(f"T{nonce}", nonce)],
+                           "peer", poa_from_hashes(hashes)))
+    return chain
+
+
+def serve(monkeypatch, chains):
+    """Peer `name` serves /headers and /blocks from chains[name]; returns the requested paths."""
+    requests = []
+
+    async def get(peer, path):
+        requests.append((peer, path))
+        url = urlsplit(path)
+        query = {k: int(v[0]) for k, v in parse_qs(url.query).items()}
+        blocks = [b for b in chains[peer] if b.block_index >= query["from"]][:query["limit"]]
+        if url.path == "/headers":
+            return 200, json.dumps([(b.block_index, b.previous_hash, b.hash) for b in blocks]).encode()
+        return 200, "".join(json.dumps(b.to_dict()) + "\n" for b in blocks).encode()
+
+    monkeypatch.setattr("sync.peer_client.get", get)
+    return requests
+
+
+def test_empty_node_adopts_the_peers_chain_in_ranges_from_several_peers(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "chain.db"))
+    monkeypatch.setattr(database, "block_cache", database.BlockCache())
+    window = PoAWindow()
+    monkeypatch.setattr("ingest.poa_window", window)
+    monkeypatch.setattr(database, "commit_listeners", [window.push])
+    chain = build_chain(12)
+    requests = serve(monkeypatch, {"a": chain, "b": chain, "short": chain[:4]})
+
+    async def main():
+        await database.init_db()
+        try:
+            commits = database.commit_stats["commits"]
+            report = await ChainSync(range_size=4).sync(["a", "b", "short"])
+            assert report["applied"] == 12 and report["tip"] == 12
+            assert (await database.get_last_block())["hash"] == chain[-1].hash
+            # genesis, then the 11 blocks after it in ranges of 4
+            assert database.commit_stats["commits"] == commits + 4
+            bodies = {peer for peer, path in requests if path.startswith("/blocks?from=") and "from=1&" not in path}
+            assert bodies == {"a", "b"}
+            assert (await ChainSync().sync(["a", "b"]))["applied"] == 0
+        finally:
+            await database.close_db()
+
+    asyncio.run(main())
@@ -0,0 +1,33 @@
+import asyncio
+from nacl.signing import SigningKey
+from transaction import SignatureVerifier, address_of, sign_transaction
+
+
+def make_tx(signing_key, tx_id="T1", amount=5):
+    tx = {"tx_id": tx_id, "sender": address_of(signing_key), "receiver": "bob",
+          "amount": amount, "fee": 0.1, "nonce": 0}
+    tx["signature"] = sign_transaction(tx, signing_key)
+    return tx
+
+
+def test_batch_verification_flags_each_transaction():
+    key = SigningKey.generate()
+    good = [make_tx(key, f"T{i}") for i in range(100)]
+    tampered = dict(make_tx(key, "T100"), amount=500)
+    forged = dict(make_tx(SigningKey.generate(), "T101"), sender=address_of(key))
+    unsigned = {k: v for k, v in make_tx(key, "T102").items() if k != "signature"}
+    verifier = SignatureVerifier(workers=2)
+
+    results = asyncio.run(verifier.verify([*good, tampered, forged, unsigned]))
+    assert results == [True] * 100 + [False, False, False]
+
+
+def test_verified_signatures_are_cached_and_bounded():
+    key = SigningKey.generate()
+    txs = [make_tx(key, f"T{i}") for i in range(5)]
+    verifier = SignatureVerifier(workers=1, limit=3)
+
+    assert asyncio.run(verifier.verify(txs)) == [True] * 5
+    assert len(verifier.verified) == 3
+    assert asyncio.run(verifier.verify(txs[-3:])) == [True] * 3
+    assert verifier.hits == 3 and verifier.misses == 5
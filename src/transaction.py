@@ -0,0 +1,111 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from nacl.exceptions import BadSignatureError
+from nacl.signing import SigningKey, VerifyKey
+from block import canonical_json
+
+# Fields a wallet signs; a sender address is the hex Ed25519 verify key.
+SIGNED_TX_FIELDS = ("tx_id", "sender", "receiver", "amount", "fee", "nonce")
+
+# (signature, payload) pairs remembered as already verified, oldest forgotten first.
+VERIFIED_SIGNATURE_LIMIT = 100_000
+
+SIGNATURE_WORKERS = 4
+
+# Fewest signatures worth handing to a pool worker as a separate chunk.
+MIN_VERIFY_CHUNK = 32
+
+
+def signing_payload(tx) -> bytes:
+    """The bytes a transaction's signature covers."""
+    return canonical_json({field: tx[field] for field in SIGNED_TX_FIELDS}).encode()
+
+
+def sign_transaction(tx, signing_key: SigningKey) -> str:
+    """Return the hex signature of `tx` by `signing_key`."""
+    return signing_key.sign(signing_payload(tx)).signature.hex()
+
+
+def address_of(signing_key: SigningKey) -> str:
+    return signing_key.verify_key.encode().hex()
+
+
+def load_signing_key(path) -> SigningKey:
+    """Read a hex Ed25519 seed from `path`, creating the file with a new key if it is missing."""
+    if os.path.exists(path):
+        with open(path) as f:
+            return SigningKey(bytes.fromhex(f.read().strip()))
+    signing_key = SigningKey.generate()
+    with open(path, "w") as f:
+        f.write(signing_key.encode().hex())
+    return signing_key
+
+
+def verify_signature(tx) -> bool:
+    try:
+        VerifyKey(bytes.fromhex(tx["sender"])).verify(signing_payload(tx), bytes.fromhex(tx["signature"]))
+        return True
+    except (BadSignatureError, KeyError, TypeError, ValueError):
+        return False
+
+
+def _verify_chunk(txs) -> list:
+    return [verify_signature(tx) for tx in txs]
+
+
+class SignatureVerifier:
+    """Checks transaction signatures in batches on a worker pool.
+
+    Signatures that verified once are cached, so a transaction seen again
+    (re-proposed, re-gossiped) costs a dict lookup instead of a verify.
+    """
+
+    def __init__(self, workers=SIGNATURE_WORKERS, limit=VERIFIED_SIGNATURE_LIMIT):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sig-verify")
+        self.workers = workers
+        self.limit = limit
+        self.verified = {}  # insertion-ordered, so the oldest entry is evicted first
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(tx):
+        try:
+            return tx["signature"], signing_payload(tx)
+        except (KeyError, TypeError):
+            return None
+
+    async def verify(self, txs) -> list:
+        """Return whether each transaction in `txs` carries a valid signature."""
+        keys = [self._key(tx) for tx in txs]
+        with self.lock:
+            results = [key is not None and key in self.verified for key in keys]
+        pending = [i for i, key in enumerate(keys) if key is not None and not results[i]]
+        self.hits += len(txs) - len(pending)
+        self.misses += len(pending)
+        if not pending:
+            return results
+
+        # One job per worker at most, so a proposal is checked in a few
+        # executor round trips instead of one per signature.
+        size = max(MIN_VERIFY_CHUNK, -(-len(pending) // self.workers))
+        chunks = [pending[i:i + size] for i in range(0, len(pending), size)]
+        loop = asyncio.get_running_loop()
+        outcomes = await asyncio.gather(*(
+            loop.run_in_executor(self.pool, _verify_chunk, [txs[i] for i in chunk]) for chunk in chunks
+        ))
+        with self.lock:
+            for chunk, oks in zip(chunks, outcomes):
+                for i, ok in zip(chunk, oks):
+                    if ok:
+                        results[i] = True
+                        self.verified[keys[i]] = None
+            while len(self.verified) > self.limit:
+                del self.verified[next(iter(self.verified))]
+        return results
+
+
+signature_verifier = SignatureVerifier()